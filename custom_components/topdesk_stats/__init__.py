@@ -8,166 +8,371 @@ from __future__ import annotations
 
 import logging
 from datetime import timedelta
-from typing import TYPE_CHECKING
+from functools import partial
+from typing import TYPE_CHECKING, Any
 
 import voluptuous as vol
+from aiohttp import InvalidURL
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.core import SupportsResponse, callback
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import config_validation as cv
 
-from .api import TOPdeskAPI
+from .api import TOPdeskAPI, get_credential_id
+from .backfill import (
+    BACKFILL_SCHEMA,
+    async_backfill_coordinator,
+    async_backfill_statistics,
+)
+from .backlog import parse_age_days
+from .budget import RequestBudget
+from .client import async_acquire_client, async_release_client
 from .const import (
-    API_CHANGE_TYPE,
-    API_INCIDENT_TYPE,
+    CAPABILITY_COUNT,
+    CAPABILITY_MODULES,
+    CONF_BACKLOG_AGE_DAYS,
+    CONF_CAPABILITIES,
+    CONF_ENABLE_WEBHOOK,
     CONF_INSTANCE_HOST,
     CONF_INSTANCE_NAME,
     CONF_INSTANCE_PASSWORD,
     CONF_INSTANCE_USERNAME,
+    CONF_MAX_REQUESTS_PER_DAY,
+    CONF_MAX_REQUESTS_PER_HOUR,
+    CONF_STATISTICS_BACKFILLED,
     CONF_UPDATE_INTERVAL,
+    DEFAULT_BACKFILL_DAYS,
+    DEFAULT_BACKLOG_AGE_DAYS,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
+    RECONCILE_INTERVAL,
 )
-from .coordinator import TOPdeskDataUpdateCoordinator
+from .coordinator import TOPdeskDataUpdateCoordinator, get_tier_intervals
+from .export import EXPORT_SCHEMA, async_export_statistics
+from .modules import MODULES
+from .profiling import PROFILE_SCHEMA, async_profile_refresh
+from .recording import RECORD_SCHEMA, async_record_traffic
+from .webhook import async_setup_webhook
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from homeassistant.config_entries import ConfigEntry
-    from homeassistant.core import HomeAssistant, ServiceCall
+    from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
 
 _LOGGER = logging.getLogger(__name__)
 
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
+PLATFORMS = ["sensor", "binary_sensor", "switch"]
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up integration from config entry."""
-    hass.data.setdefault(DOMAIN, {"coordinators": {}, "service_registered": False})
 
-    # Action registration (once)
-    if not hass.data[DOMAIN]["service_registered"]:
-        _LOGGER.debug("Registering service...")
-
-        available_instances = [
-            c.config_entry.data[CONF_INSTANCE_NAME]
-            for c in hass.data[DOMAIN]["coordinators"].values()
-        ]
-
-        async def async_trigger_update(call: ServiceCall) -> None:
-            """Handle service call."""
-            instance_name = call.data.get(CONF_INSTANCE_NAME)
-            _LOGGER.debug(
-                "Manually refresh data for instance: %s",
-                instance_name or "all instances",
-            )
+@callback
+def async_register_services(hass: HomeAssistant) -> bool:
+    """Register the integration actions, returns False if that failed."""
+    _LOGGER.debug("Registering service...")
 
-            _LOGGER.debug("Available instances: %s", available_instances)
+    async def async_trigger_update(call: ServiceCall) -> None:
+        """Handle service call."""
+        instance_name = call.data.get(CONF_INSTANCE_NAME)
+        _LOGGER.debug(
+            "Manually refresh data for instance: %s",
+            instance_name or "all instances",
+        )
 
-            if DOMAIN not in hass.data or "coordinators" not in hass.data[DOMAIN]:
-                _LOGGER.error("No TOPdesk-coordinators found")
-                return
+        if DOMAIN not in hass.data or "coordinators" not in hass.data[DOMAIN]:
+            _LOGGER.error("No TOPdesk-coordinators found")
+            return
 
-            refreshed = False
-            for entry_id in list(hass.data[DOMAIN]["coordinators"].keys()):
-                coordinator = hass.data[DOMAIN]["coordinators"][entry_id]
-                config_name = coordinator.config_entry.data.get(
-                    CONF_INSTANCE_NAME, "Unknown"
-                )
+        refreshed = False
+        for coordinators in list(hass.data[DOMAIN]["coordinators"].values()):
+            for coordinator in coordinators.values():
+                config_name = coordinator.api.instance_name
 
                 if instance_name and config_name != instance_name:
                     _LOGGER.debug("Skipping %s (name doesn't match)", config_name)
                     continue
 
                 try:
-                    _LOGGER.info("Manually refresh data from %s", config_name)
-                    await coordinator.async_request_refresh()
+                    _LOGGER.info(
+                        "Manually refresh %s from %s", coordinator.api_type, config_name
+                    )
+                    # A manual refresh fetches every tier, not only the due ones
+                    await coordinator.async_request_full_refresh()
                     refreshed = True
                 except Exception:
                     _LOGGER.exception("Refresh failed from %s:", config_name)
 
-            if not refreshed:
-                _LOGGER.warning(
-                    "No matching instances found for: %s",
-                    instance_name or "all",
-                )
-
-        try:
-            hass.services.async_register(
-                DOMAIN,
-                "trigger_update",
-                async_trigger_update,
-                schema=vol.Schema(
-                    {
-                        vol.Optional(CONF_INSTANCE_NAME): cv.string,
-                    }
-                ),
+        if not refreshed:
+            _LOGGER.warning(
+                "No matching instances found for: %s",
+                instance_name or "all",
             )
-            hass.data[DOMAIN]["service_registered"] = True
-            _LOGGER.info("Service successfully registered")
-        except Exception:
-            _LOGGER.exception("Service registration failed:")
-            return False
 
-    async with TOPdeskAPI(
-        entry.data[CONF_INSTANCE_HOST],
-        entry.data[CONF_INSTANCE_USERNAME],
-        entry.data[CONF_INSTANCE_PASSWORD],
-        entry.data[CONF_INSTANCE_NAME],
-    ) as api:
-        # Get version and tickets
-        await api.fetch_version()
-        await api.fetch_tickets()
+    try:
+        hass.services.async_register(
+            DOMAIN,
+            "trigger_update",
+            async_trigger_update,
+            schema=vol.Schema(
+                {
+                    vol.Optional(CONF_INSTANCE_NAME): cv.string,
+                }
+            ),
+        )
+
+        async def async_export(call: ServiceCall) -> ServiceResponse:
+            """Handle export service call."""
+            return await async_export_statistics(hass, call)
+
+        hass.services.async_register(
+            DOMAIN,
+            "export_statistics",
+            async_export,
+            schema=EXPORT_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+        async def async_backfill(call: ServiceCall) -> ServiceResponse:
+            """Handle backfill service call."""
+            return await async_backfill_statistics(hass, call)
+
+        hass.services.async_register(
+            DOMAIN,
+            "backfill_statistics",
+            async_backfill,
+            schema=BACKFILL_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+        async def async_record(call: ServiceCall) -> ServiceResponse:
+            """Handle record service call."""
+            return await async_record_traffic(hass, call)
+
+        hass.services.async_register(
+            DOMAIN,
+            "record_traffic",
+            async_record,
+            schema=RECORD_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+        async def async_profile(call: ServiceCall) -> ServiceResponse:
+            """Handle profile service call."""
+            return await async_profile_refresh(hass, call)
+
+        hass.services.async_register(
+            DOMAIN,
+            "profile_refresh",
+            async_profile,
+            schema=PROFILE_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+        hass.data[DOMAIN]["service_registered"] = True
+        _LOGGER.info("Service successfully registered")
+    except Exception:
+        _LOGGER.exception("Service registration failed:")
+        return False
+
+    return True
+
 
-    config_entry_id = entry.entry_id
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up integration from config entry."""
+    hass.data.setdefault(
+        DOMAIN, {"coordinators": {}, "clients": {}, "service_registered": False}
+    )
+
+    # Action registration (once)
+    if not hass.data[DOMAIN]["service_registered"] and not async_register_services(
+        hass
+    ):
+        return False
 
     update_interval = timedelta(
         minutes=entry.options.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
     )
 
-    # Create multiple API instances, for example, for incidents and changes
-    api_incidents = TOPdeskAPI(
-        entry.data[CONF_INSTANCE_HOST],
-        entry.data[CONF_INSTANCE_USERNAME],
-        entry.data[CONF_INSTANCE_PASSWORD],
-        entry.data[CONF_INSTANCE_NAME],
-        api_type=API_INCIDENT_TYPE,
+    # With pushed updates, polling only reconciles the counters
+    push_enabled = entry.options.get(CONF_ENABLE_WEBHOOK, False) and bool(
+        entry.options.get(CONF_WEBHOOK_ID)
+    )
+    tier_intervals = get_tier_intervals(update_interval)
+    if push_enabled:
+        reconcile_interval = timedelta(minutes=RECONCILE_INTERVAL)
+        tier_intervals = {
+            tier: max(interval, reconcile_interval)
+            for tier, interval in tier_intervals.items()
+        }
+
+    capabilities = await async_get_capabilities(hass, entry)
+
+    # One request budget for all modules of the instance
+    budget = RequestBudget(
+        entry.options.get(CONF_MAX_REQUESTS_PER_HOUR, 0),
+        entry.options.get(CONF_MAX_REQUESTS_PER_DAY, 0),
     )
 
-    api_changes = TOPdeskAPI(
-        entry.data[CONF_INSTANCE_HOST],
-        entry.data[CONF_INSTANCE_USERNAME],
-        entry.data[CONF_INSTANCE_PASSWORD],
-        entry.data[CONF_INSTANCE_NAME],
-        api_type=API_CHANGE_TYPE,
+    backlog_age_days = parse_age_days(
+        entry.options.get(CONF_BACKLOG_AGE_DAYS, DEFAULT_BACKLOG_AGE_DAYS)
     )
 
-    coordinator_incidents = TOPdeskDataUpdateCoordinator(
+    # Entries with the same host and credentials share sessions and requests
+    client = async_acquire_client(
         hass,
-        api_incidents,
-        update_interval,
-        config_entry_id,
-        api_type=API_INCIDENT_TYPE,
+        get_credential_id(
+            entry.data[CONF_INSTANCE_HOST],
+            entry.data[CONF_INSTANCE_USERNAME],
+            entry.data[CONF_INSTANCE_PASSWORD],
+        ),
     )
+    entry.async_on_unload(partial(async_release_client, hass, client))
+
+    # Create an API instance and coordinator for each enabled module only
+    coordinators: dict[str, TOPdeskDataUpdateCoordinator] = {}
+    for api_type, module in MODULES.items():
+        enable_option = module.enable_option
+        if not entry.options.get(
+            enable_option, entry.data.get(enable_option, module.enabled_by_default)
+        ):
+            _LOGGER.info(
+                "%s is disabled for %s", api_type, entry.data[CONF_INSTANCE_NAME]
+            )
+            continue
+        if not capabilities[CAPABILITY_MODULES].get(api_type, True):
+            _LOGGER.info(
+                "%s is not available for %s", api_type, entry.data[CONF_INSTANCE_NAME]
+            )
+            continue
+
+        api = TOPdeskAPI(
+            entry.data[CONF_INSTANCE_HOST],
+            entry.data[CONF_INSTANCE_USERNAME],
+            entry.data[CONF_INSTANCE_PASSWORD],
+            entry.data[CONF_INSTANCE_NAME],
+            api_type=api_type,
+            capabilities=capabilities,
+            budget=budget,
+            client=client,
+        )
+        coordinator = TOPdeskDataUpdateCoordinator(
+            hass,
+            api,
+            update_interval,
+            entry.entry_id,
+            api_type=api_type,
+            tier_intervals=tier_intervals,
+            backlog_age_days=backlog_age_days,
+        )
+
+        # Start the coordinator, with the rates from before a restart
+        try:
+            await coordinator.async_load_trends()
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            # Setup is retried as a whole, stop the modules started so far
+            for started in (*coordinators.values(), coordinator):
+                await started.async_shutdown()
+            raise
 
-    coordinator_changes = TOPdeskDataUpdateCoordinator(
-        hass, api_changes, update_interval, config_entry_id, api_type=API_CHANGE_TYPE
-    )
+        # Reset the today counters at local midnight
+        entry.async_on_unload(coordinator.async_track_day_boundary())
 
-    # Start the coordinators
-    await coordinator_incidents.async_config_entry_first_refresh()
-    await coordinator_changes.async_config_entry_first_refresh()
+        coordinators[api_type] = coordinator
 
     # Save in Home Assistant data store
-    hass.data[DOMAIN]["coordinators"][entry.entry_id] = {
-        API_INCIDENT_TYPE: coordinator_incidents,
-        API_CHANGE_TYPE: coordinator_changes,
-    }
+    hass.data[DOMAIN]["coordinators"][entry.entry_id] = coordinators
 
     # Platform setup
-    await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    if push_enabled:
+        entry.async_on_unload(async_setup_webhook(hass, entry))
+
+    # Apply changed options, such as enabled modules, thresholds and budget
+    entry.async_on_unload(
+        entry.add_update_listener(partial(update_listener, options=dict(entry.options)))
+    )
+
+    # Give a new instance history, so graphs don't start empty
+    if (
+        not entry.data.get(CONF_STATISTICS_BACKFILLED)
+        and "recorder" in hass.config.components
+    ):
+        entry.async_create_background_task(
+            hass,
+            async_initial_backfill(hass, entry),
+            f"{DOMAIN}_backfill_{entry.entry_id}",
+        )
 
     return True
 
 
-async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Handle options update."""
-    await hass.config_entries.async_reload(entry.entry_id)
+async def async_get_capabilities(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """
+    Return the capability profile of the instance.
+
+    Entries created before profiles were recorded, or before query options
+    were recorded per module, are probed once, after that the profile is read
+    from the entry. Modules whose probes failed are probed again on setup.
+    """
+    stored = entry.data.get(CONF_CAPABILITIES)
+    if stored is not None and isinstance(stored.get(CAPABILITY_COUNT), dict):
+        # Probes that timed out left the module unknown, they are tried again
+        known = stored[CAPABILITY_MODULES].keys() & stored[CAPABILITY_COUNT].keys()
+        if known >= MODULES.keys():
+            return stored
+
+    async with TOPdeskAPI(
+        entry.data[CONF_INSTANCE_HOST],
+        entry.data[CONF_INSTANCE_USERNAME],
+        entry.data[CONF_INSTANCE_PASSWORD],
+        entry.data[CONF_INSTANCE_NAME],
+    ) as api:
+        try:
+            capabilities = await api.probe_capabilities()
+        except (ConnectionError, InvalidURL) as err:
+            if stored is not None:
+                # The older profile still works, without the query options
+                _LOGGER.warning("Unable to update the capability profile: %s", err)
+                return stored
+            msg = f"Unable to connect to {entry.data[CONF_INSTANCE_NAME]}: {err}"
+            raise ConfigEntryNotReady(msg) from err
+
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_CAPABILITIES: capabilities}
+    )
+    return capabilities
+
+
+async def async_initial_backfill(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Backfill the long-term statistics of a new instance once."""
+    coordinators = hass.data[DOMAIN]["coordinators"].get(entry.entry_id, {})
+    try:
+        for coordinator in coordinators.values():
+            await async_backfill_coordinator(hass, coordinator, DEFAULT_BACKFILL_DAYS)
+    except Exception:
+        _LOGGER.exception("Backfill of statistics failed:")
+        return
+
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_STATISTICS_BACKFILLED: True}
+    )
+
+
+async def update_listener(
+    hass: HomeAssistant, entry: ConfigEntry, options: Mapping[str, Any]
+) -> None:
+    """
+    Handle options update.
+
+    The listener also runs when the integration updates the entry data, eg.
+    once the statistics are backfilled, which doesn't need a reload.
+    """
+    if dict(entry.options) != options:
+        await hass.config_entries.async_reload(entry.entry_id)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -177,8 +382,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Get all coordinators
     coordinators = hass.data[DOMAIN]["coordinators"].get(entry.entry_id, {})
 
-    # Check whether coordinators exist at all
-    if not coordinators:
+    # Check whether the entry was set up at all
+    if entry.entry_id not in hass.data[DOMAIN]["coordinators"]:
         _LOGGER.warning("No coordinators found for entry: %s", entry.entry_id)
         return False
 
@@ -191,11 +396,15 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     del hass.data[DOMAIN]["coordinators"][entry.entry_id]
 
     # Unload the platforms
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, ["sensor"])
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     # Check for other integrations, if not, remove service
     if not hass.data[DOMAIN]["coordinators"]:
         hass.services.async_remove(DOMAIN, "trigger_update")
+        hass.services.async_remove(DOMAIN, "export_statistics")
+        hass.services.async_remove(DOMAIN, "backfill_statistics")
+        hass.services.async_remove(DOMAIN, "record_traffic")
+        hass.services.async_remove(DOMAIN, "profile_refresh")
         hass.data[DOMAIN]["service_registered"] = False
 
     _LOGGER.info(
@@ -6,55 +6,109 @@ topdesk_stats/coordinator.py
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import hashlib
 import logging
+import time
 import urllib.parse
-from datetime import UTC, datetime, timedelta
-from typing import Self
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from functools import partial
+from typing import TYPE_CHECKING, Any, Self
 
 import aiohttp
-from aiohttp import ClientError, ClientSession, ClientTimeout, InvalidURL
+from aiohttp import ClientError, ClientSession, ClientTimeout, InvalidURL, hdrs
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
 
+from .cache import RESPONSE_CACHE
 from .const import (
-    API_CHANGE_BASE_PATH,
-    API_CHANGE_TYPE,
-    API_INCIDENT_BASE_PATH,
     API_INCIDENT_TYPE,
+    API_REPORTING_BASE_PATH,
+    CAPABILITY_APPLY,
+    CAPABILITY_BATCH,
+    CAPABILITY_COUNT,
+    CAPABILITY_MODULES,
+    CAPABILITY_VERSION,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    LATENCY_SAMPLES,
+    PAGE_SIZE,
+    PAGE_TIMEOUT,
+    PARSE_EXECUTOR_THRESHOLD,
+    PROBE_TIMEOUT,
+    REQUEST_TIMEOUT,
     STATUS_200,
+    STATUS_304,
+    STATUS_500,
 )
+from .deadline import current_deadline, request_timeout
+from .modules import MODULES
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+
+    from .budget import RequestBudget
+    from .client import TOPdeskClient
+    from .recording import ReplaySession, TrafficRecorder
 
 _LOGGER = logging.getLogger(__name__)
 
 
 def get_past_date(days: int) -> str:
-    """Return a past date in OData format (YYYY-MM-DDTHH:MM:SSZ)."""
-    past_date = datetime.now(UTC) - timedelta(days=days)
-    return past_date.strftime("%Y-%m-%dT00:00:00Z")
+    """
+    Return the start of a past local day in OData format (YYYY-MM-DDTHH:MM:SSZ).
+
+    The day boundary follows the time zone configured in Home Assistant and is
+    converted to UTC, because TOPdesk compares dates in UTC.
+    """
+    past_day = dt_util.now().date() - timedelta(days=days)
+    past_date = dt_util.as_utc(dt_util.start_of_local_day(past_day))
+    return past_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def get_credential_id(host: str, username: str, password: str) -> str:
+    """Return an id of the host and credentials that doesn't reveal them."""
+    auth_header = base64.b64encode(f"{username}:{password}".encode()).decode()
+    return hashlib.sha256(f"{host.rstrip('/')}_{auth_header}".encode()).hexdigest()[:16]
+
+
+def _decode_json(body: bytes, parse: Callable[[Any], Any]) -> Any:
+    """Decode a JSON body and parse the result."""
+    return parse(json_loads(body))
 
 
 class TOPdeskAPI:
     """Handles communication with the TOPdesk API."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         instance_host: str,
         instance_username: str,
         instance_password: str,
         instance_name: str,
-        api_type: str = API_INCIDENT_TYPE,  # Defaults to API_INCIDENT_TYPE
+        api_type: str = API_INCIDENT_TYPE,  # A key of MODULES
+        capabilities: dict[str, Any] | None = None,
+        budget: RequestBudget | None = None,
+        client: TOPdeskClient | None = None,
     ) -> None:
         """Initialize for communication."""
         self.instance_name = instance_name
         self.instance_version = ""
         self.host = instance_host.rstrip("/")
         self.api_type = api_type
+        self.module = MODULES[api_type]
+        self.capabilities = capabilities or {}
+        self.budget = budget  # Shared by the APIs of one instance
+        self.client = client  # Shared by the entries with the same credentials
+        # Records the traffic to a file, or replays a recording instead
+        self.recorder: TrafficRecorder | None = None
+        self.replay: ReplaySession | None = None
 
-        # Dynamically set the base_url based on api_type
-        if self.api_type == API_CHANGE_TYPE:
-            self.base_url = f"{self.host}{API_CHANGE_BASE_PATH}"
-        else:  # Defaults to API_INCIDENT_TYPE
-            self.base_url = f"{self.host}{API_INCIDENT_BASE_PATH}"
+        self.base_url = self.module.base_url(self.host)
 
         self.device_id = hashlib.sha256(
             f"{self.host}_{instance_name}".encode()
@@ -62,7 +116,25 @@ class TOPdeskAPI:
         self.auth_header = base64.b64encode(
             f"{instance_username}:{instance_password}".encode()
         ).decode()
-        self.timeout = ClientTimeout(total=15)
+        # Identifies the credentials in cache keys without keeping them readable
+        self.credential_id = get_credential_id(
+            self.host, instance_username, instance_password
+        )
+        # Seconds spent decoding and parsing responses on the event loop
+        self.loop_time = 0.0
+        # Seconds spent waiting for responses and decoding them, wherever that
+        # runs, summed over concurrent requests
+        self.request_time = 0.0
+        self.parse_time = 0.0
+        # Traffic counters, reported in the diagnostics
+        self.request_count = 0
+        self.bytes_received = 0
+        self.sessions_opened = 0
+        # Latency of recent requests, drives hedging and the diagnostics
+        self.latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.timeouts = 0
+        self.hedged = 0
+        self.hedges_won = 0
         self.session = None  # The session will be initialized later
 
         _LOGGER.debug(
@@ -73,8 +145,12 @@ class TOPdeskAPI:
         )
 
     async def __aenter__(self) -> Self:
-        """Start the client session."""
+        """Start the client session, or use the session of the shared client."""
+        if self.client is not None:
+            self.session = self.client.session
+            return self
         self.session = aiohttp.ClientSession()
+        self.sessions_opened += 1
         if self.session:
             _LOGGER.debug("API session started for %s", self.host)
         return self
@@ -83,12 +159,28 @@ class TOPdeskAPI:
         self,
         *excinfo: object,
     ) -> bool | None:
-        """Make sure the session is closed."""
-        if self.session:
+        """Make sure the session is closed, unless it is shared."""
+        if self.session and self.client is None:
             await self.session.close()
             _LOGGER.debug("API session closed for %s", self.host)
         return
 
+    @asynccontextmanager
+    async def scan_session(self) -> AsyncIterator[ClientSession]:
+        """
+        Yield a session for a scan that runs next to the refreshes.
+
+        That is the session of the shared client, so the scan uses its
+        connection pool. Without a client the scan gets a session of its own,
+        as the session of the API is replaced and closed by each refresh.
+        """
+        if self.client is not None:
+            yield self.client.session
+            return
+        async with aiohttp.ClientSession() as session:
+            self.sessions_opened += 1
+            yield session
+
     def _generate_device_id(self) -> str:
         """Generate a unique device ID based on the host name."""
         return hashlib.sha256(self.host.encode()).hexdigest()[:10]
@@ -104,112 +196,206 @@ class TOPdeskAPI:
             _LOGGER.exception("Error fetching version:")
             return None
 
-    async def test_connection(self) -> bool:
-        """Test API connectivity."""
-        try:
-            if not self.host.startswith(("http://", "https://")):
-                msg = "Invalid URL protocol"
-                raise InvalidURL(msg)  # noqa: TRY301
+    async def probe_capabilities(self) -> dict[str, Any]:
+        """
+        Probe the version, modules and query capabilities in parallel.
+
+        Every probe has a short timeout. A probe that is refused or answered
+        without the expected data marks that capability as unavailable, one
+        that times out or fails to connect leaves it out of the profile as
+        unknown. Raises ConnectionError when even the product version can't be
+        fetched.
+        """
+        if not self.host.startswith(("http://", "https://")):
+            msg = "Invalid URL protocol"
+            raise InvalidURL(msg)
+        if self.session is None:
+            msg = "Session is not initialized"
+            raise ValueError(msg)
+
+        session = self.session
+        module_urls = {
+            api_type: module.base_url(self.host) for api_type, module in MODULES.items()
+        }
+        probes = {}
+        for api_type, url in module_urls.items():
+            probes[(CAPABILITY_MODULES, api_type)] = self._probe(
+                session, f"{url}?$select=id&$top=1", lambda data: "value" in data
+            )
+            probes[(CAPABILITY_COUNT, api_type)] = self._probe(
+                session,
+                f"{url}?$select=id&$top=0&$count=true",
+                lambda data: "@odata.count" in data,
+            )
+            probes[(CAPABILITY_APPLY, api_type)] = self._probe(
+                session,
+                f"{url}?$apply=aggregate($count%20as%20total)",
+                lambda data: "value" in data,
+            )
+        probes[(CAPABILITY_BATCH, None)] = self._probe(
+            session,
+            f"{self.host}{API_REPORTING_BASE_PATH}$batch",
+            lambda data: "responses" in data,
+            json={
+                "requests": [{"id": "1", "method": "GET", "url": "Incidents?$top=0"}]
+            },
+        )
 
-            version = await self.fetch_version()
-            if version is None:
-                msg = "Unable to get product version"
-                raise ValueError(msg)  # noqa: TRY301
+        version, *results = await asyncio.gather(
+            self._fetch_product_version(session, ClientTimeout(total=PROBE_TIMEOUT)),
+            *probes.values(),
+            return_exceptions=True,
+        )
+        if not isinstance(version, str):
+            msg = f"Unable to get product version: {version}"
+            raise ConnectionError(msg)
+
+        found = {
+            probe: result if isinstance(result, bool) else None
+            for probe, result in zip(probes, results, strict=True)
+        }
+        capabilities: dict[str, Any] = {CAPABILITY_VERSION: version}
+        # Query options are probed per module, as each has its own entity set
+        for capability in (CAPABILITY_MODULES, CAPABILITY_COUNT, CAPABILITY_APPLY):
+            capabilities[capability] = {
+                api_type: result
+                for api_type in module_urls
+                if (result := found[(capability, api_type)]) is not None
+            }
+        capabilities[CAPABILITY_BATCH] = found[(CAPABILITY_BATCH, None)] is True
+
+        _LOGGER.debug("[%s] Capabilities: %s", self.instance_name, capabilities)
+        return capabilities
+
+    async def _probe(
+        self,
+        session: ClientSession,
+        url: str,
+        check: Callable[[Any], bool],
+        json: Any | None = None,
+    ) -> bool | None:
+        """
+        Return whether a request succeeds and its response passes check.
 
-        except InvalidURL:
-            _LOGGER.exception("Error in URL:")
-            return False
-        except ClientError:
-            _LOGGER.exception("API connection error:")
+        Returns None when that is unknown: on a timeout, connection or server
+        error, which says nothing about what the instance supports.
+        """
+        try:
+            async with self._transport(session).request(
+                "GET" if json is None else "POST",
+                url,
+                headers={"Authorization": f"Basic {self.auth_header}"},
+                json=json,
+                timeout=ClientTimeout(total=PROBE_TIMEOUT),
+            ) as response:
+                if response.status >= STATUS_500:
+                    _LOGGER.debug("Probe %s responded with %s", url, response.status)
+                    return None
+                if response.status != STATUS_200:
+                    _LOGGER.debug("Probe %s responded with %s", url, response.status)
+                    return False
+                return check(await response.json(content_type=None))
+        except (ClientError, TimeoutError) as err:
+            _LOGGER.debug("Probe %s failed: %s", url, err)
+            return None
+        except ValueError as err:
+            _LOGGER.debug("Probe %s returned no JSON: %s", url, err)
             return False
-        except Exception:
-            _LOGGER.exception("Connection test failed:")
+
+    def _supports(self, capability: str) -> bool:
+        """Return whether the entity set of this module supports a query option."""
+        supported = self.capabilities.get(capability)
+        # Older profiles hold one flag for all modules, which can't be trusted
+        if not isinstance(supported, dict):
             return False
+        return bool(supported.get(self.api_type))
 
-        else:
-            return True
+    def metric_filters(self) -> dict[str, str]:
+        """Return the OData filter of each metric of this API type."""
+        return self.module.metric_filters(
+            today=get_past_date(0), week_ago=get_past_date(7)
+        )
 
-        finally:
-            if self.session:
-                await self.close()
+    async def fetch_metrics(
+        self, keys: Iterable[str] | None = None
+    ) -> dict[str, int | None]:
+        """
+        Fetch the counts of the given metrics, or of all metrics.
+
+        The queries run concurrently and independently: a failing query only
+        results in None for its own metric.
+        """
+        if self.session is None:
+            msg = "Session is not initialized"
+            raise ValueError(msg)
+
+        filters = self.metric_filters()
+        if keys is not None:
+            filters = {key: filters[key] for key in keys if key in filters}
+
+        results = await asyncio.gather(
+            *(
+                self._fetch_count(self.session, filter_query)
+                for filter_query in filters.values()
+            ),
+            return_exceptions=True,
+        )
+        return {
+            key: result if isinstance(result, int) else None
+            for key, result in zip(filters, results, strict=True)
+        }
 
-    async def fetch_tickets(
+    async def iter_pages(
         self,
-    ) -> tuple[int | None, int | None, int | None, int | None, int | None]:
-        """Fetch ticket counts using OData queries."""
-        try:
-            if self.session is None:
-                msg = "Session is not initialized"
-                raise ValueError(msg)  # noqa: TRY301
-
-            total_tickets = await self._fetch_count(
-                self.session, "(creationDate gt 1970-01-01T00:00:00Z)"
-            )
-
-            new_today_count = await self._fetch_new_today_count(self.session)
-
-            if self.api_type == API_INCIDENT_TYPE:
-                completed_count = await self._fetch_count(
-                    self.session, "(completed eq true)"
-                )
-                closed_completed_count = await self._fetch_count(
-                    self.session, "(completed eq true) and (closed eq true)"
-                )
-                completed_today_count = await self._fetch_completed_today_count(
-                    self.session
-                )
-
-            elif self.api_type == API_CHANGE_TYPE:
-                completed_count = await self._fetch_count(
-                    self.session, "(closed eq true)"
-                )
-                closed_completed_count = await self._fetch_count(
-                    self.session,
-                    f"(closed eq true) and (closureDate lt {get_past_date(7)})",
-                )
-                completed_today_count = await self._fetch_count(
-                    self.session,
-                    f"(creationDate ge {get_past_date(0)}) and (closed eq true)",
-                )
-            else:
-                _LOGGER.error("Unknown API type: %s", self.api_type)
-                return None, None, None, None, None
-
-        except Exception:
-            _LOGGER.exception("API error:")
-            return None, None, None, None, None
-
-        return (
-            total_tickets,
-            completed_count,
-            closed_completed_count,
-            new_today_count,
-            completed_today_count,
+        session: ClientSession,
+        filter_query: str,
+        select: str,
+        page_size: int = PAGE_SIZE,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Yield the records matching filter_query, one page per request.
+
+        Only a single page is held in memory, so callers can stream any number
+        of tickets as long as they process each page before asking for the next.
+        """
+        # Paging by $skip needs a stable order, or tickets changing during the
+        # scan shift between pages and are skipped or repeated
+        query = (
+            f"$select={select}&$filter={urllib.parse.quote(filter_query)}"
+            f"&$orderby=id&$top={page_size}"
         )
-
-    async def _fetch_new_today_count(self, session: ClientSession) -> int | None:
-        """Fetch new tickets created today."""
-        today = datetime.now(UTC).strftime("%Y-%m-%dT00:00:00Z")
-        filter_query = f"(creationDate ge {today})"
-        return await self._fetch_count(session, filter_query)
-
-    async def _fetch_completed_today_count(self, session: ClientSession) -> int | None:
-        """Fetch completed tickets created today, adapted for incidents or changes."""
-        today = get_past_date(0)  # Vandaag
-        creation_date = f"(creationDate ge {today})"
-        if self.api_type == API_INCIDENT_TYPE:
-            filter_query = (
-                f"{creation_date} and (completed eq true) and (closed eq false)"
-            )
-        elif self.api_type == API_CHANGE_TYPE:
-            filter_query = f"{creation_date} and (closed eq true)"
-        else:
-            _LOGGER.error(
-                "Unknown API type in _fetch_completed_today_count: %s", self.api_type
-            )
-            return None
-
-        return await self._fetch_count(session, filter_query)
+        skip = 0
+        url: str | None = f"{self.base_url}?{query}&$skip={skip}"
+        while url:
+            self._record_request()
+            start = time.perf_counter()
+            async with self._transport(session).get(
+                url,
+                headers={"Authorization": f"Basic {self.auth_header}"},
+                timeout=request_timeout(PAGE_TIMEOUT),
+            ) as response:
+                if response.status != STATUS_200:
+                    _LOGGER.error(
+                        "API responded with %s: %s",
+                        response.status,
+                        await response.text(),
+                    )
+                    response.raise_for_status()
+                body = await response.read()
+            self.request_time += time.perf_counter() - start
+            data = await self._decode(body, lambda data: data)
+
+            records = data.get("value", [])
+            if records:
+                yield records
+
+            if next_link := data.get("@odata.nextLink"):
+                url = urllib.parse.urljoin(self.base_url, next_link)
+            elif len(records) >= page_size:
+                skip += len(records)
+                url = f"{self.base_url}?{query}&$skip={skip}"
+            else:
+                url = None
 
     async def _fetch_count(
         self, session: ClientSession, filter_query: str
@@ -217,60 +403,241 @@ class TOPdeskAPI:
         """Fetch count using original working method."""
         try:
             encoded_filter = urllib.parse.quote(filter_query)
-            url = f"{self.base_url}?$select=id&$filter={encoded_filter}"
-            timeout = ClientTimeout(total=10)
-            async with session.get(
-                url,
-                headers={"Authorization": f"Basic {self.auth_header}"},
-                timeout=timeout,
-            ) as response:
-                if response.status == STATUS_200:
-                    data = await response.json()
-                    return len(data.get("value", []))
-                _LOGGER.error(
-                    "API responded with %s: %s", response.status, await response.text()
+            if self._supports(CAPABILITY_COUNT):
+                # Let TOPdesk count instead of transferring every id
+                url = (
+                    f"{self.base_url}?$select=id&$top=0&$count=true"
+                    f"&$filter={encoded_filter}"
+                )
+                return await self._fetch_json(
+                    session, url, lambda data: data.get("@odata.count")
                 )
-                return None
+
+            url = f"{self.base_url}?$select=id&$filter={encoded_filter}"
+            return await self._fetch_json(
+                session, url, lambda data: len(data.get("value", []))
+            )
 
         except Exception:
             _LOGGER.exception("Error in _fetch_count")
             raise
 
-    async def _fetch_product_version(self, session: ClientSession) -> str | None:
+    async def _fetch_product_version(
+        self, session: ClientSession, client_timeout: ClientTimeout | None = None
+    ) -> str | None:
         """Fetch the product version from the API."""
         try:
             url = f"{self.host}/tas/api/productVersion"
-            timeout = ClientTimeout(total=10)
-            async with session.get(
-                url,
-                headers={"Authorization": f"Basic {self.auth_header}"},
-                timeout=timeout,
-            ) as response:
-                if response.status == STATUS_200:
-                    data = await response.json()
-                    major = data.get("major")
-                    minor = data.get("minor")
-                    patch = data.get("patch")
-                    product_version = f"{major}.{minor}.{patch}"
-                    _LOGGER.debug(
-                        "API responded with product version: %s",
-                        product_version,
-                    )
-                    if major is not None and minor is not None and patch is not None:
-                        return product_version
-
-                    _LOGGER.error("Incomplete version data: %s", data)
-                    return None
-                _LOGGER.error(
-                    "API responded with %s: %s", response.status, await response.text()
-                )
-                return None
+            data = await self._fetch_json(
+                session, url, lambda data: data, client_timeout
+            )
         except Exception:
             _LOGGER.exception("Error in _fetch_product_version:")
             raise
 
+        if data is None:
+            return None
+
+        major = data.get("major")
+        minor = data.get("minor")
+        patch = data.get("patch")
+        product_version = f"{major}.{minor}.{patch}"
+        _LOGGER.debug(
+            "API responded with product version: %s",
+            product_version,
+        )
+        if major is not None and minor is not None and patch is not None:
+            return product_version
+
+        _LOGGER.error("Incomplete version data: %s", data)
+        return None
+
+    async def _fetch_json(
+        self,
+        session: ClientSession,
+        url: str,
+        parse: Callable[[Any], Any],
+        client_timeout: ClientTimeout | None = None,
+    ) -> Any | None:
+        """
+        Fetch a JSON resource and return the parsed result.
+
+        Sends a conditional request when validators of an earlier response are
+        cached. On 304 Not Modified the cached parsed result is reused, so
+        unchanged data is neither transferred nor parsed again. With a shared
+        client, identical requests of other entries are sent only once.
+        """
+        attempt = partial(self._request_json, session, url, parse, client_timeout)
+        if self.client is not None:
+            return await self.client.async_request(url, lambda: self._hedged(attempt))
+        return await self._hedged(attempt)
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a request, and a second one when the first is slower than usual.
+
+        A slow response is mostly one unlucky request among fast ones, so a
+        duplicate sent after the usual latency tends to finish first. The first
+        successful result is used and the other request is cancelled. Without
+        enough latency samples, budget or time before the deadline, no
+        duplicate is sent.
+        """
+        first = asyncio.ensure_future(self._timed(attempt))
+        tasks = {first}
+        try:
+            delay = self._hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._hedge_allowed(delay):
+                    _LOGGER.debug("Hedging a request after %.2f s", delay)
+                    self.hedged += 1
+                    tasks.add(asyncio.ensure_future(self._timed(attempt)))
+
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Collect every error, so none is reported as never retrieved
+                errors = {task: task.exception() for task in done}
+                for task, error in errors.items():
+                    if error is None:
+                        if task is not first:
+                            self.hedges_won += 1
+                        return task.result()
+                if not pending:
+                    raise next(iter(errors.values()))  # type: ignore[misc]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _timed(self, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a request, recording its latency or timeout."""
+        start = time.monotonic()
+        try:
+            result = await attempt()
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+        self.latencies.append(time.monotonic() - start)
+        return result
+
+    def latency_percentile(self, fraction: float) -> float | None:
+        """Return a percentile of the recent latencies in seconds."""
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+    def _hedge_delay(self) -> float | None:
+        """Return after how long a request is hedged, None to never hedge."""
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY, self.latency_percentile(HEDGE_PERCENTILE) or 0)
+
+    def _hedge_allowed(self, delay: float) -> bool:
+        """
+        Return whether a duplicate request fits the deadline and budget.
+
+        The deadline is the one the request runs under: for a request shared
+        through the client, the deadline it shares with the callers waiting.
+        """
+        deadline = current_deadline()
+        if deadline is not None and deadline.remaining() <= delay:
+            return False
+        return self.budget is None or self.budget.allows(1)
+
+    async def _request_json(
+        self,
+        session: ClientSession,
+        url: str,
+        parse: Callable[[Any], Any],
+        client_timeout: ClientTimeout | None = None,
+    ) -> Any | None:
+        """Send a conditional request for a JSON resource."""
+        headers = {"Authorization": f"Basic {self.auth_header}"}
+        cache_key = (self.credential_id, url)
+        cached = RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        timeout = client_timeout or request_timeout(REQUEST_TIMEOUT)
+        self._record_request()
+        start = time.perf_counter()
+        async with self._transport(session).get(
+            url, headers=headers, timeout=timeout
+        ) as response:
+            body = await response.read()
+            self.request_time += time.perf_counter() - start
+
+            if response.status == STATUS_304 and cached is not None:
+                RESPONSE_CACHE.record(hit=True)
+                _LOGGER.debug("Response not modified, using cached result: %s", url)
+                return cached.result
+
+            if response.status == STATUS_200:
+                RESPONSE_CACHE.record(hit=False)
+                result = await self._decode(body, parse)
+                RESPONSE_CACHE.store(
+                    cache_key,
+                    response.headers.get(hdrs.ETAG),
+                    response.headers.get(hdrs.LAST_MODIFIED),
+                    result,
+                )
+                return result
+
+            _LOGGER.error(
+                "API responded with %s: %s",
+                response.status,
+                body.decode(errors="replace"),
+            )
+            return None
+
+    def _transport(self, session: ClientSession) -> Any:
+        """Return what requests are sent through: session, or a recording."""
+        if self.replay is not None:
+            return self.replay
+        if self.recorder is not None:
+            return self.recorder.wrap(session, self.host)
+        return session
+
+    def _record_request(self) -> None:
+        """Count a request, also against the budget of the instance."""
+        self.request_count += 1
+        if self.budget is not None:
+            self.budget.record()
+
+    async def _decode(self, body: bytes, parse: Callable[[Any], Any]) -> Any:
+        """
+        Decode a JSON body and parse the result.
+
+        A large body, such as the ids of every ticket, blocks the event loop
+        for tens of milliseconds, so from PARSE_EXECUTOR_THRESHOLD on both the
+        decoding and parsing run in the executor. The time spent on the event
+        loop is added to loop_time, and all of it to parse_time.
+        """
+        self.bytes_received += len(body)
+        start = time.perf_counter()
+        if len(body) >= PARSE_EXECUTOR_THRESHOLD:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, _decode_json, body, parse
+                )
+            finally:
+                self.parse_time += time.perf_counter() - start
+
+        try:
+            return _decode_json(body, parse)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.loop_time += elapsed
+            self.parse_time += elapsed
+
     async def close(self) -> None:
-        """Close the API session."""
-        if self.session:
+        """Close the API session, unless it is shared."""
+        if self.session and self.client is None:
             await self.session.close()
             _LOGGER.debug("API session closed for %s", self.host)
@@ -0,0 +1,202 @@
+"""
+Statistics backfill for TOPdesk Statistics integration.
+
+topdesk_stats/backfill.py
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+import voluptuous as vol
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .api import get_past_date
+from .const import (
+    CONF_DAYS,
+    CONF_INSTANCE_NAME,
+    DEFAULT_BACKFILL_DAYS,
+    DOMAIN,
+)
+from .coordinator import get_instance_coordinators
+from .snapshot import SnapshotRow, parse_records
+
+if TYPE_CHECKING:
+    from datetime import date
+
+    from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+
+    from .coordinator import TOPdeskDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+BACKFILL_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_INSTANCE_NAME): cv.string,
+        vol.Optional(CONF_DAYS, default=DEFAULT_BACKFILL_DAYS): vol.All(
+            cv.positive_int, vol.Range(max=3650)
+        ),
+    }
+)
+
+
+def _local_date(value: str | None) -> date | None:
+    """Return the local date of an OData timestamp."""
+    if not value:
+        return None
+    parsed = dt_util.parse_datetime(value)
+    if parsed is None:
+        return None
+    return dt_util.as_local(parsed).date()
+
+
+def _build_statistics(
+    counts: Counter[date], first_day: date, last_day: date
+) -> list[StatisticData]:
+    """Return cumulative daily statistics, including days without tickets."""
+    statistics: list[StatisticData] = []
+    total = 0
+    day = first_day
+    while day <= last_day:
+        total += counts[day]
+        statistics.append(
+            StatisticData(
+                start=dt_util.start_of_local_day(day),
+                state=counts[day],
+                sum=total,
+            )
+        )
+        day += timedelta(days=1)
+    return statistics
+
+
+def _raise_without_budget(coordinator: TOPdeskDataUpdateCoordinator) -> None:
+    """Raise when the request budget of the instance has no request left."""
+    budget = coordinator.api.budget
+    if budget is not None and not budget.allows(1):
+        msg = f"Request budget of {coordinator.api.instance_name} is exhausted"
+        raise HomeAssistantError(msg)
+
+
+async def async_backfill_coordinator(
+    hass: HomeAssistant, coordinator: TOPdeskDataUpdateCoordinator, days: int
+) -> dict[str, int]:
+    """
+    Import daily created and completed counts of the past days.
+
+    Both series come from a single streamed scan over the tickets created or
+    completed in the period, instead of one count query per day and metric.
+    Today is left out, as its counts are not final yet. The scanned tickets
+    are stored in the ticket snapshot of the coordinator.
+    """
+    if coordinator.backfill_running:
+        msg = f"A backfill of {coordinator.api_type} is already running"
+        raise HomeAssistantError(msg)
+    coordinator.backfill_running = True
+    try:
+        return await _async_backfill(hass, coordinator, days)
+    finally:
+        coordinator.backfill_running = False
+
+
+async def _async_backfill(
+    hass: HomeAssistant, coordinator: TOPdeskDataUpdateCoordinator, days: int
+) -> dict[str, int]:
+    """Scan the tickets of the period and import their daily counts."""
+    api = coordinator.api
+    module = coordinator.module.name
+    completion_field = coordinator.module.completion_field
+
+    start = get_past_date(days)
+    filter_query = f"(creationDate ge {start}) or ({completion_field} ge {start})"
+    first_day = dt_util.now().date() - timedelta(days=days)
+    last_day = dt_util.now().date() - timedelta(days=1)
+
+    created: Counter[date] = Counter()
+    completed: Counter[date] = Counter()
+
+    def process_page(records: list[dict[str, Any]]) -> list[SnapshotRow]:
+        """Count a page of tickets per day and parse their per-ticket state."""
+        for record in records:
+            if (day := _local_date(record.get("creationDate"))) is not None:
+                created[day] += 1
+            if (day := _local_date(record.get(completion_field))) is not None:
+                completed[day] += 1
+        return parse_records(records, completion_field)
+
+    # Through the API of the module, so every page counts against its budget
+    _raise_without_budget(coordinator)
+    async with api.scan_session() as session:
+        async for records in api.iter_pages(
+            session, filter_query, coordinator.module.snapshot_fields
+        ):
+            # Parsing thousands of timestamps would block the event loop, the
+            # snapshot itself is only changed on the loop
+            rows = await hass.async_add_executor_job(process_page, records)
+            coordinator.snapshot.update_from_rows(rows)
+            # Stop before the next page, statistics of part of the period
+            # would look like days without tickets
+            _raise_without_budget(coordinator)
+
+    for kind, counts in (("created", created), ("completed", completed)):
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"{api.instance_name} {module} {kind}",
+            source=DOMAIN,
+            statistic_id=f"{DOMAIN}:{slugify(f'{api.device_id} {module} {kind}')}",
+            unit_of_measurement=None,
+        )
+        async_add_external_statistics(
+            hass, metadata, _build_statistics(counts, first_day, last_day)
+        )
+
+    _LOGGER.info(
+        "Backfilled %d days of %s statistics for %s", days, module, api.instance_name
+    )
+    return {
+        kind: sum(
+            count for day, count in counts.items() if first_day <= day <= last_day
+        )
+        for kind, counts in (("created", created), ("completed", completed))
+    }
+
+
+async def async_backfill_statistics(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Backfill the long-term statistics of an instance."""
+    instance_name = call.data[CONF_INSTANCE_NAME]
+    days = call.data[CONF_DAYS]
+
+    if "recorder" not in hass.config.components:
+        msg = "The recorder is required to backfill statistics"
+        raise HomeAssistantError(msg)
+
+    coordinators = get_instance_coordinators(hass, instance_name)
+    if not coordinators:
+        msg = f"No instance found with name: {instance_name}"
+        raise HomeAssistantError(msg)
+
+    if any(coordinator.backfill_running for coordinator in coordinators.values()):
+        msg = f"A backfill of {instance_name} is already running"
+        raise HomeAssistantError(msg)
+
+    result = {}
+    for api_type, coordinator in coordinators.items():
+        try:
+            result[api_type] = await async_backfill_coordinator(hass, coordinator, days)
+        except aiohttp.ClientError as err:
+            msg = f"Backfill of {api_type} for {instance_name} failed: {err}"
+            raise HomeAssistantError(msg) from err
+
+    return result
@@ -0,0 +1,94 @@
+"""
+Backlog age for TOPdesk Statistics integration.
+
+topdesk_stats/backlog.py
+"""
+
+from __future__ import annotations
+
+import logging
+from bisect import bisect_right
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import MAX_BACKLOG_AGE_BUCKETS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+_LOGGER = logging.getLogger(__name__)
+
+DAY = 86400  # seconds
+
+
+def parse_age_days(text: str) -> tuple[int, ...]:
+    """
+    Return the bucket edges in a text like "1, 7, 30" as sorted days.
+
+    Raises ValueError when the text holds anything but positive whole days, or
+    more than MAX_BACKLOG_AGE_BUCKETS edges.
+    """
+    days = {int(part) for part in text.replace(";", ",").split(",") if part.strip()}
+    if not days or min(days) < 1 or len(days) > MAX_BACKLOG_AGE_BUCKETS:
+        msg = f"Invalid backlog age days: {text}"
+        raise ValueError(msg)
+    return tuple(sorted(days))
+
+
+def age_bucket_key(prefix: str, days: int) -> str:
+    """Return the data key of the tickets older than a number of days."""
+    return f"{prefix}_{days}d"
+
+
+class BacklogAgeScan:
+    """
+    Counts open tickets older than each edge while streaming their pages.
+
+    The creation cutoffs of the edges are sorted oldest first, so a single
+    bisect per ticket finds its bucket, whatever the number of edges. Only the
+    bucket counts and the oldest creation time are kept, never the tickets.
+    """
+
+    def __init__(self, edges: Iterable[int], now: float) -> None:
+        """Initialize the scan, edges are days and now is epoch seconds."""
+        self.now = now
+        self.edges = tuple(sorted(set(edges), reverse=True))  # Oldest cutoff first
+        self._cutoffs = [now - days * DAY for days in self.edges]
+        self._counts = [0] * (len(self.edges) + 1)
+        self.oldest: float | None = None
+        self.scanned = 0
+
+    def add_page(self, records: Iterable[dict[str, Any]]) -> None:
+        """Count a page of tickets, parses timestamps so run it in the executor."""
+        cutoffs = self._cutoffs
+        counts = self._counts
+        oldest = self.oldest
+        for record in records:
+            value = record.get("creationDate")
+            parsed = dt_util.parse_datetime(value) if value else None
+            if parsed is None:
+                _LOGGER.debug("Skipping ticket without creation date: %s", record)
+                continue
+            created = parsed.timestamp()
+            counts[bisect_right(cutoffs, created)] += 1
+            if oldest is None or created < oldest:
+                oldest = created
+            self.scanned += 1
+        self.oldest = oldest
+
+    def older_than(self) -> dict[int, int]:
+        """Return the number of tickets older than each edge, in days."""
+        result = {}
+        total = 0
+        # Bucket i holds the tickets between cutoff i - 1 and cutoff i
+        for days, count in zip(self.edges, self._counts, strict=False):
+            total += count
+            result[days] = total
+        return result
+
+    def oldest_age(self) -> int:
+        """Return the age of the oldest ticket in seconds, 0 without tickets."""
+        if self.oldest is None:
+            return 0
+        return max(0, int(self.now - self.oldest))
@@ -6,4 +6,120 @@ topdesk_stats/binary_sensor.py
 
 from __future__ import annotations
 
-# to do
+import logging
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import (
+    CONF_INSTANCE_NAME,
+    DOMAIN,
+    THRESHOLD_HYSTERESIS,
+)
+from .definitions import (
+    TOPDESK_BINARY_SENSORS,
+    TOPdeskBinarySensorEntityDescription,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+    from .coordinator import TOPdeskDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up binary sensors through coordinator."""
+    coordinators = hass.data[DOMAIN]["coordinators"][config_entry.entry_id]
+    instance_name = config_entry.data[CONF_INSTANCE_NAME]
+
+    entities = []
+    for api_type, coordinator in coordinators.items():
+        for description in TOPDESK_BINARY_SENSORS.get(api_type, ()):
+            threshold = config_entry.options.get(
+                description.threshold_option, description.default_threshold
+            )
+            entities.append(TOPdeskBinarySensor(coordinator, description, threshold))
+            _LOGGER.debug(
+                "Added binary sensor %s for instance %s",
+                description.key,
+                instance_name,
+            )
+
+    async_add_entities(entities)
+    _LOGGER.debug(
+        "Added %d binary sensors for instance %s", len(entities), instance_name
+    )
+
+
+class TOPdeskBinarySensor(CoordinatorEntity, BinarySensorEntity):
+    """
+    Represents a TOPdesk threshold alert.
+
+    The state is evaluated from the data the coordinator already holds, so an
+    alert adds no API requests. It turns on above the threshold and only turns
+    off again once the value drops THRESHOLD_HYSTERESIS below it, so a value
+    hovering around the threshold doesn't flap.
+    """
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: TOPdeskDataUpdateCoordinator,
+        entity_description: TOPdeskBinarySensorEntityDescription,
+        threshold: float,
+    ) -> None:
+        """Initialize TOPdesk binary sensor entity."""
+        super().__init__(coordinator)
+        self.entity_description = entity_description
+        self.threshold = threshold
+        self._value: float | None = None
+        self._attr_is_on = False
+        self._attr_device_info = getattr(coordinator, "device_info", None)
+        self._attr_unique_id = f"{coordinator.api.instance_name.lower().replace(' ', '_')}_{coordinator.api.device_id}_{entity_description.key}"  # noqa: E501
+        self._attr_translation_key = entity_description.key
+        self._attr_icon = entity_description.icon
+        self._evaluate()
+        _LOGGER.debug("Initialized binary sensor: %s", self.unique_id)
+
+    def _evaluate(self) -> None:
+        """Evaluate the threshold with hysteresis."""
+        if not self.coordinator.data:
+            return
+
+        self._value = self.entity_description.value_fn(self.coordinator.data)
+        if self._value is None:
+            return
+
+        if self.threshold > 0:
+            turns_off = self._value < self.threshold * (1 - THRESHOLD_HYSTERESIS)
+        else:
+            # Without a positive threshold there is no band to fall back below
+            turns_off = self._value <= self.threshold
+
+        if self._value > self.threshold:
+            self._attr_is_on = True
+        elif turns_off:
+            self._attr_is_on = False
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._evaluate()
+        super()._handle_coordinator_update()
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the measured value and threshold."""
+        value = round(self._value, 2) if self._value is not None else None
+        return {"value": value, "threshold": self.threshold}
@@ -0,0 +1,119 @@
+"""
+API request budget for TOPdesk Statistics integration.
+
+topdesk_stats/budget.py
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600  # seconds
+
+
+class RequestBudget:
+    """
+    Caps the API requests of one instance per hour and per local day.
+
+    Every request made by a TOPdeskAPI of the instance is recorded. The
+    coordinators register how many requests per hour their schedule needs and
+    stretch their intervals by stretch_factor() when that is more than the
+    budget allows: the hourly cap, or what is left of the daily cap spread over
+    the rest of the day. A limit of 0 means unlimited.
+    """
+
+    def __init__(self, max_per_hour: int = 0, max_per_day: int = 0) -> None:
+        """Initialize the budget."""
+        self.max_per_hour = max_per_hour
+        self.max_per_day = max_per_day
+        self._hour: deque[float] = deque()  # Monotonic time of each request
+        self._day = dt_util.now().date()
+        self._day_count = 0
+        self._demand: dict[str, float] = {}
+
+    @property
+    def limited(self) -> bool:
+        """Return whether any cap is configured."""
+        return bool(self.max_per_hour or self.max_per_day)
+
+    def record(self, count: int = 1) -> None:
+        """Record requests that were sent."""
+        self._roll_day()
+        now = time.monotonic()
+        self._prune_hour(now)
+        self._hour.extend([now] * count)
+        self._day_count += count
+
+    def used_hour(self) -> int:
+        """Return the number of requests in the past hour."""
+        self._prune_hour(time.monotonic())
+        return len(self._hour)
+
+    def _prune_hour(self, now: float) -> None:
+        """Forget requests older than an hour, also when nothing reads them."""
+        cutoff = now - HOUR
+        while self._hour and self._hour[0] <= cutoff:
+            self._hour.popleft()
+
+    def used_day(self) -> int:
+        """Return the number of requests since local midnight."""
+        self._roll_day()
+        return self._day_count
+
+    def remaining(self) -> int | None:
+        """Return the number of requests left right now, None when unlimited."""
+        remaining = []
+        if self.max_per_hour:
+            remaining.append(self.max_per_hour - self.used_hour())
+        if self.max_per_day:
+            remaining.append(self.max_per_day - self.used_day())
+        return max(0, min(remaining)) if remaining else None
+
+    def allows(self, count: int) -> bool:
+        """Return whether count requests fit in the budget."""
+        remaining = self.remaining()
+        return remaining is None or remaining >= count
+
+    def set_demand(self, key: str, per_hour: float) -> None:
+        """Register the requests per hour a schedule needs."""
+        self._demand[key] = per_hour
+
+    def remove_demand(self, key: str) -> None:
+        """Forget the demand of a schedule that stopped."""
+        self._demand.pop(key, None)
+
+    def allowed_per_hour(self) -> float | None:
+        """Return the sustainable requests per hour, None when unlimited."""
+        allowed = []
+        if self.max_per_hour:
+            allowed.append(float(self.max_per_hour))
+        if self.max_per_day:
+            now = dt_util.now()
+            midnight = dt_util.start_of_local_day(now.date() + timedelta(days=1))
+            hours_left = max((midnight - now).total_seconds() / HOUR, 1)
+            allowed.append((self.max_per_day - self.used_day()) / hours_left)
+        return max(0.0, min(allowed)) if allowed else None
+
+    def stretch_factor(self) -> float:
+        """Return how much the intervals must be stretched to stay in budget."""
+        allowed = self.allowed_per_hour()
+        demand = sum(self._demand.values())
+        if allowed is None or demand <= allowed:
+            return 1.0
+        if allowed <= 0:
+            return float("inf")
+        return demand / allowed
+
+    def _roll_day(self) -> None:
+        """Start counting from zero at local midnight."""
+        today = dt_util.now().date()
+        if today != self._day:
+            self._day = today
+            self._day_count = 0
@@ -0,0 +1,81 @@
+"""
+Response cache for TOPdesk Statistics integration.
+
+topdesk_stats/cache.py
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from .const import RESPONSE_CACHE_MAX_ENTRIES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """Validators and parsed result of an earlier response."""
+
+    etag: str | None
+    last_modified: str | None
+    result: Any
+
+
+class ResponseCache:
+    """Bounded LRU cache of conditional request validators per URL."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES) -> None:
+        """Initialize the cache."""
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str], CachedResponse] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of cached responses."""
+        return len(self._entries)
+
+    def get(self, key: tuple[str, str]) -> CachedResponse | None:
+        """Return the cached response for key and mark it as recently used."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def store(
+        self,
+        key: tuple[str, str],
+        etag: str | None,
+        last_modified: str | None,
+        result: Any,
+    ) -> None:
+        """Store a response, evicting the least recently used entries if full."""
+        if etag is None and last_modified is None:
+            # Without validators the server can never answer 304
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = CachedResponse(etag, last_modified, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            _LOGGER.debug("Evicted cached response for %s", evicted[1])
+
+    def record(self, *, hit: bool) -> None:
+        """Count a conditional request outcome."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        self._entries.clear()
+
+
+# Shared by all TOPdeskAPI instances, so the size bound holds across instances
+RESPONSE_CACHE = ResponseCache()
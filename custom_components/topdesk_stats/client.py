@@ -0,0 +1,150 @@
+"""
+Shared clients for TOPdesk Statistics integration.
+
+topdesk_stats/client.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from homeassistant.core import callback
+
+from .const import DOMAIN, SHARED_RESULT_WINDOW
+from .deadline import current_deadline, deadline_context
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from homeassistant.core import HomeAssistant
+
+    from .deadline import Deadline
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TOPdeskClient:
+    """
+    Connection pool and in-flight requests of one host and set of credentials.
+
+    Config entries that point at the same instance with the same credentials
+    share a client. An identical request that is already in flight is not sent
+    again: every caller gets the result of the request that is. Results stay
+    shared for SHARED_RESULT_WINDOW seconds, so entries refreshing right after
+    each other don't repeat the queries either.
+
+    A shared request belongs to no caller: it runs under a copy of the refresh
+    deadline of whoever started it, extended to the latest deadline of the
+    callers that join it, and each caller stops waiting at its own deadline.
+    Only the request actually sent counts against a budget.
+    """
+
+    def __init__(self, credential_id: str) -> None:
+        """Initialize the client."""
+        self.credential_id = credential_id
+        self.users = 0
+        # Traffic counters, reported in the diagnostics
+        self.sessions_opened = 0
+        self.requests = 0  # Requests sent
+        self.shared = 0  # Requests answered by the request of another caller
+        self._session: aiohttp.ClientSession | None = None
+        self._in_flight: dict[str, tuple[asyncio.Future[Any], Deadline | None]] = {}
+        self._recent: dict[str, tuple[float, Any]] = {}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the shared session, starting it when needed."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+            self.sessions_opened += 1
+            _LOGGER.debug("Shared session started for %s", self.credential_id)
+        return self._session
+
+    async def async_request(self, url: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of fetch, or of an identical request for url."""
+        now = time.monotonic()
+        self._recent = {
+            key: recent
+            for key, recent in self._recent.items()
+            if now - recent[0] < SHARED_RESULT_WINDOW
+        }
+        if url in self._recent:
+            self.shared += 1
+            _LOGGER.debug("Reusing the result of an identical request: %s", url)
+            return self._recent[url][1]
+
+        deadline = current_deadline()
+        if url in self._in_flight:
+            future, shared_deadline = self._in_flight[url]
+            if shared_deadline is not None:
+                # The request, and its hedging, may run as long as any caller
+                shared_deadline.extend(deadline)
+            self.shared += 1
+            _LOGGER.debug("Joining an identical request in flight: %s", url)
+        else:
+            self.requests += 1
+            shared_deadline = deadline.copy() if deadline is not None else None
+            future = asyncio.get_running_loop().create_task(
+                self._async_fetch(url, fetch),
+                context=deadline_context(shared_deadline),
+            )
+            # Retrieve the error, also when every caller stopped waiting
+            future.add_done_callback(_retrieve_exception)
+            self._in_flight[url] = (future, shared_deadline)
+
+        # A caller that times out must not cancel the request of the others
+        async with asyncio.timeout(
+            deadline.remaining() if deadline is not None else None
+        ):
+            return await asyncio.shield(future)
+
+    async def _async_fetch(self, url: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Send a request and share its result."""
+        try:
+            result = await fetch()
+        finally:
+            del self._in_flight[url]
+        if result is not None:
+            self._recent[url] = (time.monotonic(), result)
+        return result
+
+    async def async_close(self) -> None:
+        """Close the shared session."""
+        if self._session is not None:
+            await self._session.close()
+            _LOGGER.debug("Shared session closed for %s", self.credential_id)
+        self._session = None
+        self._recent.clear()
+
+
+def _retrieve_exception(future: asyncio.Future[Any]) -> None:
+    """Mark the error of a shared request as retrieved, the callers log it."""
+    if not future.cancelled():
+        future.exception()
+
+
+@callback
+def async_acquire_client(hass: HomeAssistant, credential_id: str) -> TOPdeskClient:
+    """Return the shared client for the credentials, creating it when needed."""
+    clients: dict[str, TOPdeskClient] = hass.data[DOMAIN].setdefault("clients", {})
+    client = clients.get(credential_id)
+    if client is None:
+        client = clients[credential_id] = TOPdeskClient(credential_id)
+    client.users += 1
+    return client
+
+
+async def async_release_client(hass: HomeAssistant, client: TOPdeskClient) -> None:
+    """Stop using a shared client, closing it when no entry uses it anymore."""
+    client.users -= 1
+    if client.users > 0:
+        return
+
+    clients: dict[str, TOPdeskClient] = hass.data[DOMAIN].get("clients", {})
+    if clients.get(client.credential_id) is client:
+        del clients[client.credential_id]
+    await client.async_close()
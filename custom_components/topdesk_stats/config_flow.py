@@ -13,21 +13,34 @@ from urllib.parse import urlparse
 import voluptuous as vol
 from aiohttp import InvalidURL
 from homeassistant import config_entries
+from homeassistant.components import webhook
+from homeassistant.const import CONF_WEBHOOK_ID
 from homeassistant.core import callback
 from homeassistant.helpers import config_validation as cv
 
 from .api import TOPdeskAPI
+from .backlog import parse_age_days
 from .const import (
-    CONF_ENABLE_CHANGES,
-    CONF_ENABLE_INCIDENTS,
+    CAPABILITY_MODULES,
+    CONF_BACKLOG_AGE_DAYS,
+    CONF_BACKLOG_THRESHOLD,
+    CONF_CAPABILITIES,
+    CONF_ENABLE_WEBHOOK,
     CONF_INSTANCE_HOST,
     CONF_INSTANCE_NAME,
     CONF_INSTANCE_PASSWORD,
     CONF_INSTANCE_USERNAME,
+    CONF_MAX_REQUESTS_PER_DAY,
+    CONF_MAX_REQUESTS_PER_HOUR,
+    CONF_NEW_TODAY_RATE_THRESHOLD,
     CONF_UPDATE_INTERVAL,
+    DEFAULT_BACKLOG_AGE_DAYS,
+    DEFAULT_BACKLOG_THRESHOLD,
+    DEFAULT_NEW_TODAY_RATE_THRESHOLD,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
 )
+from .modules import MODULES
 
 DATA_SCHEMA = vol.Schema(
     {
@@ -35,8 +48,10 @@ DATA_SCHEMA = vol.Schema(
         vol.Required(CONF_INSTANCE_HOST): cv.string,
         vol.Required(CONF_INSTANCE_USERNAME, default=""): cv.string,
         vol.Required(CONF_INSTANCE_PASSWORD, default=""): cv.string,
-        vol.Optional(CONF_ENABLE_INCIDENTS, default=True): bool,
-        vol.Optional(CONF_ENABLE_CHANGES, default=True): bool,
+        **{
+            vol.Optional(module.enable_option, default=module.enabled_by_default): bool
+            for module in MODULES.values()
+        },
     }
 )
 
@@ -61,19 +76,26 @@ class TOPdeskConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     msg = "Invalid URL: missing http:// of https://"
                     raise InvalidURL(msg)  # noqa: TRY301
 
-                # Test de verbinding
+                # Test the connection and record what the instance supports
                 async with TOPdeskAPI(
                     user_input[CONF_INSTANCE_HOST],
                     user_input[CONF_INSTANCE_USERNAME],
                     user_input[CONF_INSTANCE_PASSWORD],
                     user_input[CONF_INSTANCE_NAME],
                 ) as api:
-                    if not await api.test_connection():
-                        msg = "Conf_flow connection test failed"
-                        raise ConnectionError(msg)  # noqa: TRY301
+                    capabilities = await api.probe_capabilities()
+
+                # A module whose probe timed out is unknown, it may be available
+                if not any(
+                    capabilities[CAPABILITY_MODULES].get(api_type, True)
+                    for api_type in MODULES
+                ):
+                    msg = "No ticket data of any module available for this account"
+                    raise ConnectionError(msg)  # noqa: TRY301
 
                 return self.async_create_entry(
-                    title=user_input["instance_name"], data=user_input
+                    title=user_input["instance_name"],
+                    data={**user_input, CONF_CAPABILITIES: capabilities},
                 )
 
             except InvalidURL as e:
@@ -125,6 +147,23 @@ class TOPdeskOptionsFlowHandler(config_entries.OptionsFlow):
         errors = {}
 
         if user_input is not None:
+            try:
+                age_days = parse_age_days(
+                    user_input.get(CONF_BACKLOG_AGE_DAYS, DEFAULT_BACKLOG_AGE_DAYS)
+                )
+            except ValueError:
+                errors[CONF_BACKLOG_AGE_DAYS] = "invalid_age_days"
+            else:
+                user_input[CONF_BACKLOG_AGE_DAYS] = ", ".join(map(str, age_days))
+
+        if user_input is not None and not errors:
+            # Keep the webhook URL stable once it is handed out to TOPdesk, also
+            # while the webhook is turned off for a while
+            webhook_id = self.config_entry.options.get(CONF_WEBHOOK_ID)
+            if webhook_id is None and user_input.get(CONF_ENABLE_WEBHOOK):
+                webhook_id = webhook.async_generate_id()
+            if webhook_id is not None:
+                user_input[CONF_WEBHOOK_ID] = webhook_id
             return self.async_create_entry(title="", data=user_input)
 
         # Get the update_interval from the configuration, with fallback to the default
@@ -154,14 +193,50 @@ class TOPdeskOptionsFlowHandler(config_entries.OptionsFlow):
                         CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL
                     ),
                 ): cv.positive_int,
+                **{
+                    vol.Optional(
+                        module.enable_option,
+                        default=self.config_entry.options.get(
+                            module.enable_option,
+                            self.config_entry.data.get(
+                                module.enable_option, module.enabled_by_default
+                            ),
+                        ),
+                    ): bool
+                    for module in MODULES.values()
+                },
                 vol.Optional(
-                    CONF_ENABLE_INCIDENTS,
-                    default=self.config_entry.options.get(CONF_ENABLE_INCIDENTS, True),
+                    CONF_ENABLE_WEBHOOK,
+                    default=self.config_entry.options.get(CONF_ENABLE_WEBHOOK, False),
                 ): bool,
                 vol.Optional(
-                    CONF_ENABLE_CHANGES,
-                    default=self.config_entry.options.get(CONF_ENABLE_CHANGES, True),
-                ): bool,
+                    CONF_BACKLOG_THRESHOLD,
+                    default=self.config_entry.options.get(
+                        CONF_BACKLOG_THRESHOLD, DEFAULT_BACKLOG_THRESHOLD
+                    ),
+                ): cv.positive_int,
+                vol.Optional(
+                    CONF_NEW_TODAY_RATE_THRESHOLD,
+                    default=self.config_entry.options.get(
+                        CONF_NEW_TODAY_RATE_THRESHOLD, DEFAULT_NEW_TODAY_RATE_THRESHOLD
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_BACKLOG_AGE_DAYS,
+                    default=self.config_entry.options.get(
+                        CONF_BACKLOG_AGE_DAYS, DEFAULT_BACKLOG_AGE_DAYS
+                    ),
+                ): cv.string,
+                vol.Optional(
+                    CONF_MAX_REQUESTS_PER_HOUR,
+                    default=self.config_entry.options.get(
+                        CONF_MAX_REQUESTS_PER_HOUR, 0
+                    ),
+                ): cv.positive_int,
+                vol.Optional(
+                    CONF_MAX_REQUESTS_PER_DAY,
+                    default=self.config_entry.options.get(CONF_MAX_REQUESTS_PER_DAY, 0),
+                ): cv.positive_int,
             }
         )
 
@@ -15,34 +15,141 @@ BRAND = "TOPdesk"
 ATTRIBUTION = "Data provided by your own TOPdesk instance"
 
 DEFAULT_UPDATE_INTERVAL = 5  # minutes
+DEFAULT_BACKFILL_DAYS = 30
 
-# API Endpoints for TOPdesk ODATA API
+# Refresh tiers, each metric is refreshed on the interval of its tier
+REFRESH_TIER_FAST = "fast"
+REFRESH_TIER_STANDARD = "standard"  # The configured update interval
+REFRESH_TIER_SLOW = "slow"
+FAST_TIER_INTERVAL = 1  # minutes
+SLOW_TIER_INTERVAL = 60  # minutes
+# Order in which tiers keep being fetched when the request budget runs out
+TIER_PRIORITIES = (REFRESH_TIER_FAST, REFRESH_TIER_STANDARD, REFRESH_TIER_SLOW)
+
+# Largest stretch of the intervals to stay within the request budget
+BUDGET_MAX_STRETCH = 60
+
+# Failed metrics are retried on their own, with a growing delay
+METRIC_RETRY_DELAY = 30  # seconds
+METRIC_RETRY_ATTEMPTS = 3
+
+# Number of recent refreshes kept for diagnostics
+REFRESH_HISTORY_SIZE = 50
+
+# Arrival and completion rates, smoothed over two half-lives
+TREND_SHORT_HALF_LIFE = 30  # minutes
+TREND_LONG_HALF_LIFE = 240  # minutes
+TRENDS_STORAGE_VERSION = 1
+TRENDS_SAVE_DELAY = 60  # seconds
+
+# Polling interval when updates are pushed through the webhook
+RECONCILE_INTERVAL = 60  # minutes
+
+# Maximum number of responses kept for conditional requests (all instances)
+RESPONSE_CACHE_MAX_ENTRIES = 256
+
+# Entries sharing a host and credentials also share the results of identical
+# requests completed this recently
+SHARED_RESULT_WINDOW = 5  # seconds
+
+# Number of records requested per page when scanning tickets
+PAGE_SIZE = 1000
+
+# Response bodies from this size on are decoded and parsed in the executor,
+# smaller ones are cheaper to handle on the event loop than to hand off
+PARSE_EXECUTOR_THRESHOLD = 64 * 1024  # bytes
+
+# Default length of a traffic recording
+DEFAULT_RECORD_DURATION = 10  # minutes
+
+# Functions returned by the profile_refresh service, and listed in its report
+DEFAULT_PROFILE_HOTSPOTS = 10
+PROFILE_REPORT_LINES = 50
+
+# Timeout of each capability probe during configuration
+PROBE_TIMEOUT = 5  # seconds
+
+# Time all requests of one refresh or retry share, and the limit per request
+REFRESH_DEADLINE = 30  # seconds
+REQUEST_TIMEOUT = 10  # seconds
+PAGE_TIMEOUT = 30  # seconds
+
+# A second, hedged request is sent when the first takes longer than the
+# HEDGE_PERCENTILE of the recent latencies, once enough samples are known
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_DELAY = 1  # seconds
+HEDGE_MIN_SAMPLES = 10
+LATENCY_SAMPLES = 50
+
+# API Endpoints for TOPdesk ODATA API, the entity set of each module is
+# declared in the module registry
+API_REPORTING_BASE_PATH = "/services/reporting/v2/odata/"
 API_INCIDENT_TYPE = "Incident Management"
-API_INCIDENT_BASE_PATH = "/services/reporting/v2/odata/Incidents/"
 API_CHANGE_TYPE = "Change Management"
-API_CHANGE_BASE_PATH = "/services/reporting/v2/odata/Changes/"
+API_PROBLEM_TYPE = "Problem Management"
+API_OPERATIONS_TYPE = "Operations Management"
+
+# Sensor ID's, the key prefix of the module is prepended, eg. incident_
+SENSOR_TOTAL_TICKETS = "total_tickets"
+SENSOR_COMPLETED_TICKETS = "completed_tickets"
+SENSOR_CLOSED_TICKETS = "closed_completed_count"
+SENSOR_NEW_TODAY = "new_tickets_today"
+SENSOR_COMPLETED_TODAY = "completed_tickets_today"
+
+# Backlog age sensors, the buckets get the number of days appended to their key
+SENSOR_OLDEST_OPEN_AGE = "oldest_open_age"
+SENSOR_OPEN_OLDER_THAN = "open_older_than"
+
+# Rate and forecast sensors, derived from the today counters
+SENSOR_ARRIVAL_RATE = "arrival_rate"
+SENSOR_COMPLETION_RATE = "completion_rate"
+SENSOR_NEW_TODAY_FORECAST = "new_today_forecast"
 
-# Sensor ID's
-SENSOR_INCIDENT_TOTAL_TICKETS = "incident_total_tickets"
-SENSOR_INCIDENT_COMPLETED_TICKETS = "incident_completed_tickets"
-SENSOR_INCIDENT_CLOSED_TICKETS = "incident_closed_completed_count"
-SENSOR_INCIDENT_NEW_TODAY = "incident_new_tickets_today"
-SENSOR_INCIDENT_COMPLETED_TODAY = "incident_completed_tickets_today"
+# Diagnostic sensors
+SENSOR_SNAPSHOT_MEMORY = "snapshot_memory"
+SENSOR_REFRESH_LOOP_TIME = "refresh_loop_time"
+SENSOR_REQUEST_BUDGET = "request_budget_remaining"
 
-SENSOR_CHANGE_TOTAL_TICKETS = "change_total_tickets"
-SENSOR_CHANGE_COMPLETED_TICKETS = "change_completed_tickets"
-SENSOR_CHANGE_CLOSED_TICKETS = "change_closed_completed_count"
-SENSOR_CHANGE_NEW_TODAY = "change_new_tickets_today"
-SENSOR_CHANGE_COMPLETED_TODAY = "change_completed_tickets_today"
+# Switch ID's
+SWITCH_POLLING = "polling"
+
+# Binary sensor ID's
+BINARY_SENSOR_BACKLOG = "backlog_above_threshold"
+BINARY_SENSOR_NEW_TODAY_RATE = "new_today_rate_above_threshold"
+
+# Ticket events pushed through the webhook
+WEBHOOK_EVENT_CREATED = "created"
+WEBHOOK_EVENT_COMPLETED = "completed"
+WEBHOOK_EVENT_CLOSED = "closed"
+
+# Backlog age buckets, open tickets older than each number of days
+DEFAULT_BACKLOG_AGE_DAYS = "1, 7, 30"
+MAX_BACKLOG_AGE_BUCKETS = 10
+
+# Binary sensors turn off once the value drops this fraction below the threshold
+THRESHOLD_HYSTERESIS = 0.1
+DEFAULT_BACKLOG_THRESHOLD = 100  # open tickets
+DEFAULT_NEW_TODAY_RATE_THRESHOLD = 10  # new tickets per hour
 
 # Status codes
 STATUS_200 = 200
+STATUS_304 = 304
 STATUS_400 = 400
 STATUS_401 = 401
 STATUS_403 = 403
 STATUS_404 = 404
 STATUS_500 = 500
 
+# Capability profile, probed once during configuration
+CAPABILITY_VERSION = "version"
+CAPABILITY_MODULES = "modules"
+CAPABILITY_COUNT = "count"
+CAPABILITY_APPLY = "apply"
+CAPABILITY_BATCH = "batch"
+
+# Events
+EVENT_EXPORT_PROGRESS = f"{DOMAIN}_export_progress"
+
 # CONF
 CONF_INSTANCE_NAME = "instance_name"
 CONF_INSTANCE_HOST = "instance_host"
@@ -51,3 +158,19 @@ CONF_INSTANCE_PASSWORD = "instance_password"  # noqa: S105
 CONF_UPDATE_INTERVAL = "update_interval"
 CONF_ENABLE_INCIDENTS = "enable_incidents"
 CONF_ENABLE_CHANGES = "enable_changes"
+CONF_ENABLE_PROBLEMS = "enable_problems"
+CONF_ENABLE_OPERATIONS = "enable_operations"
+CONF_ENABLE_WEBHOOK = "enable_webhook"
+CONF_BACKLOG_THRESHOLD = "backlog_threshold"
+CONF_NEW_TODAY_RATE_THRESHOLD = "new_today_rate_threshold"
+CONF_MODULE = "module"
+CONF_FORMAT = "format"
+CONF_DAYS = "days"
+CONF_FILENAME = "filename"
+CONF_DURATION = "duration"
+CONF_HOTSPOTS = "hotspots"
+CONF_STATISTICS_BACKFILLED = "statistics_backfilled"
+CONF_CAPABILITIES = "capabilities"
+CONF_MAX_REQUESTS_PER_HOUR = "max_requests_per_hour"
+CONF_MAX_REQUESTS_PER_DAY = "max_requests_per_day"
+CONF_BACKLOG_AGE_DAYS = "backlog_age_days"
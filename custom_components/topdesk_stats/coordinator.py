@@ -6,40 +6,96 @@ topdesk_stats/coordinator.py
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
 from typing import TYPE_CHECKING
 
 import async_timeout
+from aiohttp import ClientError
+from homeassistant.core import HassJob, callback
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.event import async_call_later, async_track_time_change
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
 
+from .backlog import BacklogAgeScan, age_bucket_key
 from .const import (
-    API_CHANGE_TYPE,
-    API_INCIDENT_TYPE,
+    BUDGET_MAX_STRETCH,
     DOMAIN,
-    SENSOR_CHANGE_CLOSED_TICKETS,
-    SENSOR_CHANGE_COMPLETED_TICKETS,
-    SENSOR_CHANGE_COMPLETED_TODAY,
-    SENSOR_CHANGE_NEW_TODAY,
-    SENSOR_CHANGE_TOTAL_TICKETS,
-    SENSOR_INCIDENT_CLOSED_TICKETS,
-    SENSOR_INCIDENT_COMPLETED_TICKETS,
-    SENSOR_INCIDENT_COMPLETED_TODAY,
-    SENSOR_INCIDENT_NEW_TODAY,
-    SENSOR_INCIDENT_TOTAL_TICKETS,
+    FAST_TIER_INTERVAL,
+    METRIC_RETRY_ATTEMPTS,
+    METRIC_RETRY_DELAY,
+    REFRESH_DEADLINE,
+    REFRESH_HISTORY_SIZE,
+    REFRESH_TIER_FAST,
+    REFRESH_TIER_SLOW,
+    REFRESH_TIER_STANDARD,
+    SENSOR_OLDEST_OPEN_AGE,
+    SENSOR_OPEN_OLDER_THAN,
+    SLOW_TIER_INTERVAL,
+    TIER_PRIORITIES,
+    TRENDS_SAVE_DELAY,
+    TRENDS_STORAGE_VERSION,
 )
+from .deadline import deadline_scope
+from .definitions import TOPDESK_SENSORS
+from .modules import MODULES
+from .snapshot import TicketSnapshot
+from .trends import RateTracker
 
 if TYPE_CHECKING:
-    from datetime import timedelta
+    from datetime import datetime
 
-    from homeassistant.core import HomeAssistant
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
 
     from .api import TOPdeskAPI
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def get_instance_coordinators(
+    hass: HomeAssistant, instance_name: str
+) -> dict[str, TOPdeskDataUpdateCoordinator]:
+    """Return the coordinators per API type of the instance with the given name."""
+    for coordinators in hass.data.get(DOMAIN, {}).get("coordinators", {}).values():
+        if any(c.api.instance_name == instance_name for c in coordinators.values()):
+            return coordinators
+    return {}
+
+
+@dataclass(slots=True)
+class RefreshRecord:
+    """Timing and traffic of a single refresh or retry."""
+
+    started: datetime
+    kind: str  # "refresh" or "retry"
+    metrics: list[str]
+    duration: float = 0.0  # seconds
+    requests: int = 0
+    bytes_received: int = 0
+    loop_time: float = 0.0  # seconds
+    timeouts: int = 0
+    hedged: int = 0
+    failed: list[str] = field(default_factory=list)
+    error: str | None = None
+
+
+def get_tier_intervals(update_interval: timedelta) -> dict[str, timedelta]:
+    """Return the refresh interval of each tier for a configured interval."""
+    return {
+        REFRESH_TIER_FAST: min(timedelta(minutes=FAST_TIER_INTERVAL), update_interval),
+        REFRESH_TIER_STANDARD: update_interval,
+        REFRESH_TIER_SLOW: max(timedelta(minutes=SLOW_TIER_INTERVAL), update_interval),
+    }
+
+
 def raise_update_failed(msg: str) -> None:
     """Throw UpdateFailed exceptions in a neat way."""
     _LOGGER.error(msg)
@@ -49,15 +105,28 @@ def raise_update_failed(msg: str) -> None:
 class TOPdeskDataUpdateCoordinator(DataUpdateCoordinator):
     """Manages data updates for TOPdesk integration."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         hass: HomeAssistant,
         api: TOPdeskAPI,
         update_interval: timedelta,
         config_entry_id: str,
-        api_type: str,  # eg. "incidents" of "changes"
+        api_type: str,  # eg. "Incident Management", a key of MODULES
+        tier_intervals: dict[str, timedelta] | None = None,
+        backlog_age_days: tuple[int, ...] = (),
     ) -> None:
         """Initialize coordinator."""
+        # Each metric is refreshed on its own tier, the coordinator ticks at
+        # the fastest tier and only fetches the metrics that are due
+        self.tier_intervals = tier_intervals or get_tier_intervals(update_interval)
+        self.metric_tiers = {
+            description.key: description.refresh_tier
+            for description in TOPDESK_SENSORS.get(api_type, ())
+        }
+        update_interval = min(
+            self.tier_intervals[tier] for tier in self.metric_tiers.values()
+        )
+
         super().__init__(
             hass,
             _LOGGER,
@@ -66,8 +135,43 @@ class TOPdeskDataUpdateCoordinator(DataUpdateCoordinator):
         )
         self.api = api
         self.api_type = api_type
+        self.module = MODULES[api_type]
         self.device_id = f"{api.device_id}_{api_type}"  # Unique device ID per API-type
         self.config_entry_id = config_entry_id
+        self.polling_interval = update_interval
+        self.metric_updated: dict[str, datetime] = {}
+        # Per-ticket state, filled by full scans such as the statistics backfill
+        self.snapshot = TicketSnapshot()
+        self.backfill_running = False
+        self._version_updated: datetime | None = None
+        # Seconds the last refresh spent on the event loop, waiting excluded
+        self.refresh_loop_time: float | None = None
+        # Seconds spent updating the device registry and the entities, summed
+        # over every refresh, reported by the profile_refresh service
+        self.registry_time = 0.0
+        self.listener_time = 0.0
+        self.refresh_history: deque[RefreshRecord] = deque(maxlen=REFRESH_HISTORY_SIZE)
+        self._refresh_all = True
+        self._fetch_lock = asyncio.Lock()
+        self._retry_attempt = 0
+        self._retry_keys: list[str] = []
+        self._unsub_retry: CALLBACK_TYPE | None = None
+        # One scan of the open tickets fills the oldest age and every bucket
+        self.backlog_age_days = backlog_age_days
+        self.backlog_age_key = self.module.key(SENSOR_OLDEST_OPEN_AGE)
+        self.backlog_bucket_prefix = self.module.key(SENSOR_OPEN_OLDER_THAN)
+        # Pages the last scan took, each one a request against the budget
+        self.backlog_scan_pages = 1
+        self.today_keys = tuple(
+            description.key
+            for description in TOPDESK_SENSORS.get(api_type, ())
+            if description.resets_daily
+        )
+        # Rates of the today counters, kept across restarts
+        self.trends: dict[str, RateTracker] = {}
+        self._trend_store: Store[dict[str, dict]] = Store(
+            hass, TRENDS_STORAGE_VERSION, f"{DOMAIN}.trends_{slugify(self.device_id)}"
+        )
 
         self.device_info = {
             "identifiers": {(DOMAIN, self.device_id)},
@@ -80,77 +184,457 @@ class TOPdeskDataUpdateCoordinator(DataUpdateCoordinator):
             "configuration_url": api.host,
         }
 
+        self._update_demand()
+
         _LOGGER.info(
             "Initialized coordinator for %s with update interval: %s",
             api_type,
             update_interval,
         )
 
+    async def async_load_trends(self) -> None:
+        """Restore the rate trackers saved before a restart."""
+        stored = await self._trend_store.async_load() or {}
+        self.trends = {
+            key: RateTracker.from_dict(state)
+            for key, state in stored.items()
+            if key in self.today_keys
+        }
+
+    def _update_trends(self, results: dict[str, int | None]) -> None:
+        """Feed fresh today counts to their rate trackers and save them later."""
+        now = dt_util.utcnow().timestamp()
+        day_start = dt_util.start_of_local_day().timestamp()
+        updated = False
+        for key in self.today_keys:
+            if (value := results.get(key)) is not None:
+                self.trends.setdefault(key, RateTracker()).update(value, now, day_start)
+                updated = True
+        if updated:
+            self._trend_store.async_delay_save(
+                lambda: {
+                    key: tracker.as_dict() for key, tracker in self.trends.items()
+                },
+                TRENDS_SAVE_DELAY,
+            )
+
+    def _update_demand(self) -> None:
+        """Tell the request budget what this schedule needs, if polling."""
+        if self.api.budget is None:
+            return
+        if self.polling_enabled:
+            self.api.budget.set_demand(self.device_id, self._requests_per_hour())
+        else:
+            self.api.budget.remove_demand(self.device_id)
+
+    @property
+    def polling_enabled(self) -> bool:
+        """Return whether the coordinator polls the API on its interval."""
+        return self.update_interval is not None
+
+    async def async_request_full_refresh(self) -> None:
+        """Request a refresh of every metric, regardless of its tier."""
+        self._refresh_all = True
+        await self.async_request_refresh()
+
+    async def async_full_refresh(self) -> None:
+        """Refresh every metric right away, bypassing the debouncer."""
+        self._refresh_all = True
+        await self.async_refresh()
+
+    def _due_metrics(self, stretch: float = 1.0) -> list[str]:
+        """Return the metrics whose (stretched) tier interval has passed."""
+        now = dt_util.utcnow()
+        # Allow for scheduling jitter, so a metric isn't pushed a full tick later
+        slack = self.polling_interval / 2
+        return [
+            key
+            for key, tier in self.metric_tiers.items()
+            if (updated := self.metric_updated.get(key)) is None
+            or now - updated + slack >= self.tier_intervals[tier] * stretch
+        ]
+
+    def _request_cost(self, keys: list[str]) -> int:
+        """Return the number of requests fetching the given metrics takes."""
+        return sum(
+            self.backlog_scan_pages if key == self.backlog_age_key else 1
+            for key in keys
+        )
+
+    def _requests_per_hour(self) -> float:
+        """Return the requests per hour the tier schedule needs."""
+        hour = timedelta(hours=1)
+        return hour / self.tier_intervals[REFRESH_TIER_SLOW] + sum(
+            hour / self.tier_intervals[tier] * self._request_cost([key])
+            for key, tier in self.metric_tiers.items()
+        )
+
+    def _apply_budget(self) -> float:
+        """Stretch the polling interval to the budget, returns the stretch."""
+        budget = self.api.budget
+        if budget is None or not budget.limited:
+            return 1.0
+
+        stretch = min(budget.stretch_factor(), BUDGET_MAX_STRETCH)
+        if self.update_interval is not None:
+            self.update_interval = self.polling_interval * stretch
+        if stretch > 1:
+            _LOGGER.debug(
+                "Stretching intervals of %s by %.1f to stay in budget",
+                self.api_type,
+                stretch,
+            )
+        return stretch
+
+    def _fit_budget(
+        self, keys: list[str], *, version_due: bool
+    ) -> tuple[list[str], bool]:
+        """Drop the lowest priority requests that don't fit in the budget."""
+        budget = self.api.budget
+        if budget is None or budget.allows(self._request_cost(keys) + version_due):
+            return keys, version_due
+
+        # The version goes first, then the slow and standard tier metrics
+        remaining = budget.remaining() or 0
+        keys = sorted(
+            keys, key=lambda key: TIER_PRIORITIES.index(self.metric_tiers[key])
+        )
+        fitted = []
+        for key in keys:
+            cost = self._request_cost([key])
+            if cost <= remaining:
+                fitted.append(key)
+                remaining -= cost
+        _LOGGER.warning(
+            "Request budget of %s is exhausted, skipping %s for %s",
+            self.api.instance_name,
+            [key for key in keys if key not in fitted],
+            self.api_type,
+        )
+        return fitted, False
+
+    @callback
+    def async_set_polling(self, *, enabled: bool) -> None:
+        """Pause or resume polling without reloading the entry."""
+        if enabled:
+            self.update_interval = self.polling_interval
+            self._schedule_refresh()
+        else:
+            self.update_interval = None
+            self._unschedule_refresh()
+        self._update_demand()
+
+        _LOGGER.info(
+            "Polling %s for %s (%s)",
+            "resumed" if enabled else "paused",
+            self.api.instance_name,
+            self.api_type,
+        )
+
+    def async_track_day_boundary(self) -> CALLBACK_TYPE:
+        """Reset the today counters at local midnight, returns the unsubscriber."""
+        return async_track_time_change(
+            self.hass, self._async_handle_midnight, hour=0, minute=0, second=0
+        )
+
+    @callback
+    def _async_handle_midnight(self, now: datetime) -> None:
+        """Start the today counters at zero without querying the API."""
+        if not self.data:
+            return
+
+        _LOGGER.debug("Local day rollover at %s for %s", now, self.api_type)
+        self.data = self._reset_today_counters(self.data)
+        self.async_update_listeners()
+
+    @callback
+    def async_apply_deltas(self, deltas: dict[str, int]) -> None:
+        """Adjust counters in place with changes pushed through the webhook."""
+        if not self.data:
+            return
+
+        self.data = {
+            key: max(0, value + deltas.get(key, 0)) if value is not None else None
+            for key, value in self.data.items()
+        }
+        self.async_update_listeners()
+
+    def _reset_today_counters(
+        self, data: dict[str, int | None]
+    ) -> dict[str, int | None]:
+        """Return a copy of data with the today counters set to zero."""
+        return {**data, **dict.fromkeys(self.today_keys, 0)}
+
     async def _async_update_data(self) -> dict[str, int | None]:
-        """Fetch data from API."""
-        _LOGGER.debug("Starting async data update for %s", self.api_type)
+        """
+        Fetch data from API.
 
+        Metrics are fetched independently: a failing query keeps serving its
+        last good value and is retried shortly on its own, while the metrics
+        that succeeded are updated right away.
+        """
+        stretch = self._apply_budget()
+        if self._refresh_all:
+            keys = list(self.metric_tiers)
+            version_due = True
+        else:
+            keys = self._due_metrics(stretch)
+            version_due = self._version_due(stretch)
+        keys, version_due = self._fit_budget(keys, version_due=version_due)
+        _LOGGER.debug("Starting async data update for %s: %s", self.api_type, keys)
+        self._refresh_all = False
+
+        # Nothing is due on this tick, the API isn't queried at all
+        if not keys and not version_due:
+            return self.data
+
+        # Failed metrics stay due, so this refresh takes over a pending retry
+        self._cancel_retry()
+
+        loop_time = self.api.loop_time
+        record = self._start_record("refresh", keys)
         try:
-            async with async_timeout.timeout(15), self.api:
-                # Get the version and update the API instance_version
-                version = await self.api.fetch_version()
-                if version:
-                    self.api.instance_version = version
-                else:
-                    raise_update_failed(
-                        f"Failed to fetch version info for {self.api_type}."
-                    )
-
-                # Update the device info in Home Assistant's Device Registry
-                device_registry = dr.async_get(self.hass)
-                device_registry.async_get_or_create(
-                    config_entry_id=self.config_entry_id,
-                    identifiers={(DOMAIN, self.device_id)},
-                    name=f"{self.api.instance_name} {self.api_type.capitalize()}",
-                    model=f"{self.api_type.capitalize()}",
-                    sw_version=self.api.instance_version,
-                    configuration_url=self.api.host,
-                )
-
-                # Get data from the correct API
-                data = await self.api.fetch_tickets()
-
-                # Check for incomplete data
-                if None in data:
-                    raise_update_failed(
-                        f"Received incomplete data from API ({self.api_type}): {data}"
-                    )
-
-                _LOGGER.debug(
-                    "Successfully received update data for %s: %s using %s",
-                    self.api_type,
-                    data,
-                    self.api.base_url,
-                )
-
-                # Return depending on the type of API
-                if self.api_type == API_INCIDENT_TYPE:
-                    return {
-                        SENSOR_INCIDENT_TOTAL_TICKETS: data[0],
-                        SENSOR_INCIDENT_COMPLETED_TICKETS: data[1],
-                        SENSOR_INCIDENT_CLOSED_TICKETS: data[2],
-                        SENSOR_INCIDENT_NEW_TODAY: data[3],
-                        SENSOR_INCIDENT_COMPLETED_TODAY: data[4],
-                    }
-
-                if self.api_type == API_CHANGE_TYPE:
-                    return {
-                        SENSOR_CHANGE_TOTAL_TICKETS: data[0],
-                        SENSOR_CHANGE_COMPLETED_TICKETS: data[1],
-                        SENSOR_CHANGE_CLOSED_TICKETS: data[2],
-                        SENSOR_CHANGE_NEW_TODAY: data[3],
-                        SENSOR_CHANGE_COMPLETED_TODAY: data[4],
-                    }
-
-                _LOGGER.warning("Unknown API type: %s", self.api_type)
-                return {}
+            async with (
+                async_timeout.timeout(REFRESH_DEADLINE),
+                self._fetch_lock,
+                self.api,
+            ):
+                # Started once the lock is held, so waiting doesn't use it up
+                with deadline_scope(REFRESH_DEADLINE):
+                    if version_due:
+                        await self._async_update_version()
+
+                    results = await self._async_fetch_metrics(keys) if keys else {}
 
         except Exception as err:
+            self._finish_record(record, keys, repr(err))
             _LOGGER.exception("Data update failed for %s:", self.api_type)
             msg = f"Error communicating with API ({self.api_type}): {err}"
             raise UpdateFailed(msg) from err
+
+        start = time.perf_counter()
+        data, failed = self._merge_results(results)
+        self._finish_record(record, failed)
+        self.refresh_loop_time = (
+            self.api.loop_time - loop_time + time.perf_counter() - start
+        )
+        _LOGGER.debug(
+            "Refresh of %s spent %.1f ms on the event loop",
+            self.api_type,
+            self.refresh_loop_time * 1000,
+        )
+        if failed:
+            self._schedule_retry(failed)
+            if len(failed) == len(results):
+                raise_update_failed(f"All queries failed for {self.api_type}")
+
+        _LOGGER.debug(
+            "Successfully received update data for %s: %s using %s",
+            self.api_type,
+            data,
+            self.api.base_url,
+        )
+        return data
+
+    def _version_due(self, stretch: float = 1.0) -> bool:
+        """Return whether the product version should be fetched again."""
+        return self._version_updated is None or (
+            dt_util.utcnow() - self._version_updated
+            >= self.tier_intervals[REFRESH_TIER_SLOW] * stretch
+        )
+
+    async def _async_update_version(self) -> None:
+        """Fetch the product version and update the device registry."""
+        self._version_updated = dt_util.utcnow()
+        version = await self.api.fetch_version()
+        if not version:
+            _LOGGER.warning("Failed to fetch version info for %s", self.api_type)
+            return
+
+        self.api.instance_version = version
+
+        # Update the device info in Home Assistant's Device Registry
+        start = time.perf_counter()
+        device_registry = dr.async_get(self.hass)
+        device_registry.async_get_or_create(
+            config_entry_id=self.config_entry_id,
+            identifiers={(DOMAIN, self.device_id)},
+            name=f"{self.api.instance_name} {self.api_type.capitalize()}",
+            model=f"{self.api_type.capitalize()}",
+            sw_version=self.api.instance_version,
+            configuration_url=self.api.host,
+        )
+        self.registry_time += time.perf_counter() - start
+
+    async def _async_fetch_metrics(self, keys: list[str]) -> dict[str, int | None]:
+        """Fetch the counts of the given metrics, and scan the backlog ages."""
+        local_day = dt_util.start_of_local_day()
+        fetches = [
+            self.api.fetch_metrics([key for key in keys if key != self.backlog_age_key])
+        ]
+        if self.backlog_age_key in keys:
+            fetches.append(self._async_scan_backlog_ages())
+        results = {}
+        for result in await asyncio.gather(*fetches):
+            results.update(result)
+
+        # Counts queried before midnight belong to the previous day
+        if dt_util.start_of_local_day() != local_day:
+            _LOGGER.debug("Refresh crossed midnight for %s", self.api_type)
+            results = {
+                key: 0 if key in self.today_keys and value is not None else value
+                for key, value in results.items()
+            }
+        return results
+
+    async def _async_scan_backlog_ages(self) -> dict[str, int | None]:
+        """
+        Return the age of the oldest open ticket and the counts per bucket.
+
+        However many buckets are configured, this is one paged scan of the
+        creation dates of the open tickets.
+        """
+        scan = BacklogAgeScan(self.backlog_age_days, time.time())
+        pages = 0
+        try:
+            async for records in self.api.iter_pages(
+                self.api.session, self.module.open_filter, "creationDate"
+            ):
+                pages += 1
+                await self.hass.async_add_executor_job(scan.add_page, records)
+        except (ClientError, TimeoutError, ValueError):
+            # Like a failed count, so the counts fetched alongside are kept
+            _LOGGER.exception("Backlog age scan failed for %s:", self.api_type)
+            return {self.backlog_age_key: None}
+
+        # The budget counts the pages the backlog takes now
+        if max(pages, 1) != self.backlog_scan_pages:
+            self.backlog_scan_pages = max(pages, 1)
+            self._update_demand()
+
+        return {
+            self.backlog_age_key: scan.oldest_age(),
+            **{
+                age_bucket_key(self.backlog_bucket_prefix, days): count
+                for days, count in scan.older_than().items()
+            },
+        }
+
+    def _merge_results(
+        self, results: dict[str, int | None]
+    ) -> tuple[dict[str, int | None], list[str]]:
+        """Merge fetched counts with the last good values of failed metrics."""
+        now = dt_util.utcnow()
+        data = dict(self.data or {})
+        failed = []
+        for key, value in results.items():
+            if value is None:
+                failed.append(key)
+                data.setdefault(key, None)
+            else:
+                data[key] = value
+                self.metric_updated[key] = now
+
+        self._update_trends(results)
+
+        if failed:
+            _LOGGER.warning(
+                "Serving last known values of %s for %s", failed, self.api_type
+            )
+        return data, failed
+
+    def _start_record(self, kind: str, keys: list[str]) -> RefreshRecord:
+        """Start recording a refresh, the counters hold their start values."""
+        return RefreshRecord(
+            started=dt_util.utcnow(),
+            kind=kind,
+            metrics=list(keys),
+            duration=time.monotonic(),
+            requests=self.api.request_count,
+            bytes_received=self.api.bytes_received,
+            loop_time=self.api.loop_time,
+            timeouts=self.api.timeouts,
+            hedged=self.api.hedged,
+        )
+
+    def _finish_record(
+        self, record: RefreshRecord, failed: list[str], error: str | None = None
+    ) -> None:
+        """Turn the start values into totals and keep the record."""
+        record.duration = time.monotonic() - record.duration
+        record.requests = self.api.request_count - record.requests
+        record.bytes_received = self.api.bytes_received - record.bytes_received
+        record.loop_time = self.api.loop_time - record.loop_time
+        record.timeouts = self.api.timeouts - record.timeouts
+        record.hedged = self.api.hedged - record.hedged
+        record.failed = list(failed)
+        record.error = error
+        self.refresh_history.append(record)
+
+    def _schedule_retry(self, keys: list[str]) -> None:
+        """Retry failed metrics soon, instead of waiting a full interval."""
+        if self._retry_attempt >= METRIC_RETRY_ATTEMPTS:
+            _LOGGER.debug("No retries left for %s of %s", keys, self.api_type)
+            return
+
+        self._retry_attempt += 1
+        self._retry_keys = keys
+        self._unsub_retry = async_call_later(
+            self.hass,
+            METRIC_RETRY_DELAY * self._retry_attempt,
+            HassJob(self._async_retry_failed, cancel_on_shutdown=True),
+        )
+
+    def _cancel_retry(self) -> None:
+        """Cancel a pending retry."""
+        if self._unsub_retry is not None:
+            self._unsub_retry()
+            self._unsub_retry = None
+        self._retry_attempt = 0
+        self._retry_keys = []
+
+    async def _async_retry_failed(self, _now: datetime) -> None:
+        """Fetch only the metrics that failed during the last refresh."""
+        self._unsub_retry = None
+        keys = self._retry_keys
+        if self.api.budget is not None and not self.api.budget.allows(
+            self._request_cost(keys)
+        ):
+            _LOGGER.debug("No budget left to retry %s for %s", keys, self.api_type)
+            return
+        _LOGGER.debug("Retrying %s for %s", keys, self.api_type)
+
+        record = self._start_record("retry", keys)
+        try:
+            async with (
+                async_timeout.timeout(REFRESH_DEADLINE),
+                self._fetch_lock,
+                self.api,
+            ):
+                with deadline_scope(REFRESH_DEADLINE):
+                    results = await self._async_fetch_metrics(keys)
+        except Exception as err:
+            _LOGGER.exception("Retry failed for %s:", self.api_type)
+            failed = keys
+            self._finish_record(record, failed, repr(err))
+        else:
+            self.data, failed = self._merge_results(results)
+            self._finish_record(record, failed)
+            self.async_update_listeners()
+
+        if failed:
+            self._schedule_retry(failed)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all entities, and add the time it takes to listener_time."""
+        start = time.perf_counter()
+        try:
+            super().async_update_listeners()
+        finally:
+            self.listener_time += time.perf_counter() - start
+
+    async def async_shutdown(self) -> None:
+        """Cancel a pending retry on shutdown."""
+        self._cancel_retry()
+        await super().async_shutdown()
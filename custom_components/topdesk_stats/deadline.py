@@ -0,0 +1,104 @@
+"""
+Refresh deadlines for TOPdesk Statistics integration.
+
+topdesk_stats/deadline.py
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from typing import TYPE_CHECKING
+
+from aiohttp import ClientTimeout
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+_LOGGER = logging.getLogger(__name__)
+
+_CURRENT_DEADLINE: ContextVar[Deadline | None] = ContextVar(
+    "topdesk_stats_deadline", default=None
+)
+
+
+class Deadline:
+    """
+    The moment by which all requests of a refresh must be done.
+
+    Every request of the refresh gets the time that is left as its timeout,
+    capped by its own limit, so one slow query can't push the others past the
+    end of the refresh. Concurrent requests share the same remaining time.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        """Initialize a deadline that expires after seconds."""
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def copy(self) -> Deadline:
+        """Return a deadline that expires at the same moment."""
+        deadline = Deadline(self.seconds)
+        deadline.expires = self.expires
+        return deadline
+
+    def extend(self, other: Deadline | None) -> None:
+        """Expire no earlier than another deadline, never when there is none."""
+        self.expires = max(self.expires, math.inf if other is None else other.expires)
+
+    def remaining(self) -> float:
+        """Return the seconds left, 0 once expired."""
+        return max(0.0, self.expires - time.monotonic())
+
+    def timeout(self, limit: float) -> ClientTimeout:
+        """Return the timeout of a request, raises TimeoutError once expired."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            msg = f"Refresh deadline of {self.seconds:g} s has passed"
+            raise TimeoutError(msg)
+        return ClientTimeout(total=min(limit, remaining))
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[Deadline]:
+    """
+    Run the requests in the block, and the tasks it starts, under a deadline.
+
+    The deadline is held in a context variable, so it reaches every request
+    without being passed through each call, and requests outside the block,
+    such as an export running at the same time, keep their own timeouts.
+    """
+    deadline = Deadline(seconds)
+    token = _CURRENT_DEADLINE.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _CURRENT_DEADLINE.reset(token)
+
+
+def deadline_context(deadline: Deadline | None) -> Context:
+    """
+    Return an empty context that only holds a deadline.
+
+    A task started in it, such as a request shared by several refreshes,
+    inherits nothing else from the caller that starts it.
+    """
+    context = Context()
+    context.run(_CURRENT_DEADLINE.set, deadline)
+    return context
+
+
+def current_deadline() -> Deadline | None:
+    """Return the deadline of the running refresh, if any."""
+    return _CURRENT_DEADLINE.get()
+
+
+def request_timeout(limit: float) -> ClientTimeout:
+    """Return the timeout of a request, within the deadline of its refresh."""
+    deadline = _CURRENT_DEADLINE.get()
+    if deadline is None:
+        return ClientTimeout(total=limit)
+    return deadline.timeout(limit)
@@ -6,27 +6,63 @@ topdesk_stats/sensor.py
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from typing import TYPE_CHECKING, TypeVar
 
-from homeassistant.components.sensor import SensorEntityDescription, SensorStateClass
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntityDescription,
+)
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.components.switch import SwitchEntityDescription
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.helpers.entity import EntityDescription
+from homeassistant.util import dt as dt_util
 
+from .backlog import age_bucket_key
 from .const import (
-    SENSOR_CHANGE_CLOSED_TICKETS,
-    SENSOR_CHANGE_COMPLETED_TICKETS,
-    SENSOR_CHANGE_COMPLETED_TODAY,
-    SENSOR_CHANGE_NEW_TODAY,
-    SENSOR_CHANGE_TOTAL_TICKETS,
-    SENSOR_INCIDENT_CLOSED_TICKETS,
-    SENSOR_INCIDENT_COMPLETED_TICKETS,
-    SENSOR_INCIDENT_COMPLETED_TODAY,
-    SENSOR_INCIDENT_NEW_TODAY,
-    SENSOR_INCIDENT_TOTAL_TICKETS,
+    BINARY_SENSOR_BACKLOG,
+    BINARY_SENSOR_NEW_TODAY_RATE,
+    CONF_BACKLOG_THRESHOLD,
+    CONF_NEW_TODAY_RATE_THRESHOLD,
+    DEFAULT_BACKLOG_THRESHOLD,
+    DEFAULT_NEW_TODAY_RATE_THRESHOLD,
+    REFRESH_TIER_FAST,
+    REFRESH_TIER_SLOW,
+    REFRESH_TIER_STANDARD,
+    SENSOR_ARRIVAL_RATE,
+    SENSOR_CLOSED_TICKETS,
+    SENSOR_COMPLETED_TICKETS,
+    SENSOR_COMPLETED_TODAY,
+    SENSOR_COMPLETION_RATE,
+    SENSOR_NEW_TODAY,
+    SENSOR_NEW_TODAY_FORECAST,
+    SENSOR_OLDEST_OPEN_AGE,
+    SENSOR_REFRESH_LOOP_TIME,
+    SENSOR_REQUEST_BUDGET,
+    SENSOR_SNAPSHOT_MEMORY,
+    SENSOR_TOTAL_TICKETS,
+    SWITCH_POLLING,
 )
+from .modules import MODULES
+from .snapshot import SNAPSHOT_BYTES_PER_TICKET_TARGET
+from .trends import rate_attributes
 
 if TYPE_CHECKING:
     from collections.abc import Callable
 
+    from .budget import RequestBudget
+    from .coordinator import TOPdeskDataUpdateCoordinator
+    from .modules import TOPdeskModule
+    from .snapshot import TicketSnapshot
+
+_DescriptionT = TypeVar("_DescriptionT", bound=EntityDescription)
+
 
 @dataclass(frozen=True)
 class TOPdeskSensorEntityDescription(SensorEntityDescription):
@@ -37,80 +73,314 @@ class TOPdeskSensorEntityDescription(SensorEntityDescription):
     exists_fn: Callable = lambda _: True
     extra_attributes: Callable = lambda _: {}
     icon: str = "mdi:help-circle"
+    resets_daily: bool = False  # Counter starts at zero at local midnight
+    refresh_tier: str = REFRESH_TIER_STANDARD
+    age_days: int | None = None  # Backlog age bucket, in days
+
+
+@dataclass(frozen=True)
+class TOPdeskBinarySensorEntityDescription(BinarySensorEntityDescription):
+    """Class describing TOPdesk binary sensor entities."""
+
+    value_fn: Callable = lambda _: None  # Measured value from coordinator data
+    threshold_option: str = ""
+    default_threshold: float = 0
+    icon: str = "mdi:alert-circle-outline"
+
+
+def open_tickets(
+    data: dict[str, int | None], total_key: str, done_key: str
+) -> int | None:
+    """Return the number of tickets that are not done yet."""
+    total = data.get(total_key)
+    done = data.get(done_key)
+    if total is None or done is None:
+        return None
+    return max(0, total - done)
+
+
+def snapshot_attributes(snapshot: TicketSnapshot) -> dict[str, int | None]:
+    """Return the size of a ticket snapshot, next to its memory budget."""
+    tickets = len(snapshot)
+    return {
+        "tickets": tickets,
+        "bytes_per_ticket": (
+            round(snapshot.memory_usage() / tickets) if tickets else None
+        ),
+        "bytes_per_ticket_target": SNAPSHOT_BYTES_PER_TICKET_TARGET,
+    }
+
+
+def budget_attributes(budget: RequestBudget) -> dict[str, float | None]:
+    """Return the use and limits of a request budget."""
+    stretch = budget.stretch_factor()
+    return {
+        "used_past_hour": budget.used_hour(),
+        "used_today": budget.used_day(),
+        "max_per_hour": budget.max_per_hour or None,
+        "max_per_day": budget.max_per_day or None,
+        "interval_stretch": round(stretch, 2) if stretch != float("inf") else None,
+    }
+
+
+def current_rate(coordinator: TOPdeskDataUpdateCoordinator, key: str) -> float | None:
+    """Return the recent rate per hour of a today counter."""
+    tracker = coordinator.trends.get(key)
+    if tracker is None or tracker.short_rate is None:
+        return None
+    return round(tracker.short_rate, 2)
 
 
-TOPDESK_INCIDENT_SENSORS: tuple[TOPdeskSensorEntityDescription, ...] = (
+def end_of_day_forecast(
+    coordinator: TOPdeskDataUpdateCoordinator, key: str
+) -> int | None:
+    """Return the expected value of a today counter at local midnight."""
+    tracker = coordinator.trends.get(key)
+    if tracker is None:
+        return None
+    now = dt_util.now()
+    day_end = dt_util.start_of_local_day(now.date() + timedelta(days=1))
+    forecast = tracker.forecast(
+        (coordinator.data or {}).get(key), now.timestamp(), day_end.timestamp()
+    )
+    return round(forecast) if forecast is not None else None
+
+
+def milliseconds(seconds: float | None) -> float | None:
+    """Return a duration in seconds as milliseconds."""
+    if seconds is None:
+        return None
+    return round(seconds * 1000, 1)
+
+
+def hourly_rate(count: int | None) -> float | None:
+    """Return the average number per hour since local midnight."""
+    if count is None:
+        return None
+    elapsed = dt_util.now() - dt_util.start_of_local_day()
+    # At least one hour, so the first tickets of the day don't spike the rate
+    return count / max(elapsed.total_seconds() / 3600, 1)
+
+
+# Sensor of each metric, the module prefix is added to the key of the template
+METRIC_SENSORS: tuple[TOPdeskSensorEntityDescription, ...] = (
+    # On the tier of the completed count, the backlog is the difference of both
     TOPdeskSensorEntityDescription(
-        key=SENSOR_INCIDENT_TOTAL_TICKETS,
-        translation_key=SENSOR_INCIDENT_TOTAL_TICKETS,
+        key=SENSOR_TOTAL_TICKETS,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:file-document-outline",
         value_fn=lambda self: self.coordinator.data.get(self.entity_description.key),
     ),
     TOPdeskSensorEntityDescription(
-        key=SENSOR_INCIDENT_CLOSED_TICKETS,
-        translation_key=SENSOR_INCIDENT_CLOSED_TICKETS,
+        key=SENSOR_CLOSED_TICKETS,
         state_class=SensorStateClass.MEASUREMENT,
+        refresh_tier=REFRESH_TIER_SLOW,
         icon="mdi:file-document-check-outline",
         value_fn=lambda self: self.coordinator.data.get(self.entity_description.key),
     ),
     TOPdeskSensorEntityDescription(
-        key=SENSOR_INCIDENT_COMPLETED_TICKETS,
-        translation_key=SENSOR_INCIDENT_COMPLETED_TICKETS,
+        key=SENSOR_COMPLETED_TICKETS,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:file-document-edit-outline",
         value_fn=lambda self: self.coordinator.data.get(self.entity_description.key),
     ),
     TOPdeskSensorEntityDescription(
-        key=SENSOR_INCIDENT_COMPLETED_TODAY,
-        translation_key=SENSOR_INCIDENT_COMPLETED_TODAY,
+        key=SENSOR_COMPLETED_TODAY,
         state_class=SensorStateClass.MEASUREMENT,
+        refresh_tier=REFRESH_TIER_FAST,
+        resets_daily=True,
         icon="mdi:file-document-check",
         value_fn=lambda self: self.coordinator.data.get(self.entity_description.key),
     ),
     TOPdeskSensorEntityDescription(
-        key=SENSOR_INCIDENT_NEW_TODAY,
-        translation_key=SENSOR_INCIDENT_NEW_TODAY,
+        key=SENSOR_NEW_TODAY,
         state_class=SensorStateClass.MEASUREMENT,
+        refresh_tier=REFRESH_TIER_FAST,
+        resets_daily=True,
         icon="mdi:file-document-plus",
         value_fn=lambda self: self.coordinator.data.get(self.entity_description.key),
     ),
 )
 
-TOPDESK_CHANGE_SENSORS: tuple[TOPdeskSensorEntityDescription, ...] = (
-    TOPdeskSensorEntityDescription(
-        key=SENSOR_CHANGE_TOTAL_TICKETS,
-        translation_key=SENSOR_CHANGE_TOTAL_TICKETS,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:file-document-outline",
-        value_fn=lambda self: self.coordinator.data.get(self.entity_description.key),
-    ),
-    TOPdeskSensorEntityDescription(
-        key=SENSOR_CHANGE_CLOSED_TICKETS,
-        translation_key=SENSOR_CHANGE_CLOSED_TICKETS,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:file-document-check-outline",
-        value_fn=lambda self: self.coordinator.data.get(self.entity_description.key),
-    ),
+OLDEST_OPEN_AGE_SENSOR = TOPdeskSensorEntityDescription(
+    key=SENSOR_OLDEST_OPEN_AGE,
+    state_class=SensorStateClass.MEASUREMENT,
+    device_class=SensorDeviceClass.DURATION,
+    native_unit_of_measurement=UnitOfTime.SECONDS,
+    suggested_unit_of_measurement=UnitOfTime.DAYS,
+    suggested_display_precision=1,
+    icon="mdi:clock-alert-outline",
+    value_fn=lambda self: self.coordinator.data.get(self.entity_description.key),
+)
+
+DIAGNOSTIC_SENSORS: tuple[TOPdeskSensorEntityDescription, ...] = (
     TOPdeskSensorEntityDescription(
-        key=SENSOR_CHANGE_COMPLETED_TICKETS,
-        translation_key=SENSOR_CHANGE_COMPLETED_TICKETS,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:file-document-edit-outline",
-        value_fn=lambda self: self.coordinator.data.get(self.entity_description.key),
+        key=SENSOR_SNAPSHOT_MEMORY,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.MEBIBYTES,
+        icon="mdi:memory",
+        value_fn=lambda self: self.coordinator.snapshot.memory_usage(),
+        extra_attributes=lambda self: snapshot_attributes(self.coordinator.snapshot),
     ),
     TOPdeskSensorEntityDescription(
-        key=SENSOR_CHANGE_COMPLETED_TODAY,
-        translation_key=SENSOR_CHANGE_COMPLETED_TODAY,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:file-document-check",
-        value_fn=lambda self: self.coordinator.data.get(self.entity_description.key),
+        key=SENSOR_REFRESH_LOOP_TIME,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=1,
+        icon="mdi:timer-sand",
+        value_fn=lambda self: milliseconds(self.coordinator.refresh_loop_time),
     ),
     TOPdeskSensorEntityDescription(
-        key=SENSOR_CHANGE_NEW_TODAY,
-        translation_key=SENSOR_CHANGE_NEW_TODAY,
+        key=SENSOR_REQUEST_BUDGET,
+        entity_category=EntityCategory.DIAGNOSTIC,
         state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:file-document-plus",
-        value_fn=lambda self: self.coordinator.data.get(self.entity_description.key),
+        icon="mdi:counter",
+        exists_fn=lambda coordinator: coordinator.api.budget is not None
+        and coordinator.api.budget.limited,
+        value_fn=lambda self: self.coordinator.api.budget.remaining(),
+        extra_attributes=lambda self: budget_attributes(self.coordinator.api.budget),
     ),
 )
+
+
+def for_module(description: _DescriptionT, module: TOPdeskModule) -> _DescriptionT:
+    """Return a template description with the key and name of a module."""
+    key = module.key(description.key)
+    return replace(description, key=key, translation_key=key)
+
+
+def module_sensors(module: TOPdeskModule) -> tuple[TOPdeskSensorEntityDescription, ...]:
+    """Return the sensors of the metrics of a module, and its oldest open age."""
+    return (
+        *(
+            for_module(description, module)
+            for description in METRIC_SENSORS
+            if description.key in module.metrics
+        ),
+        for_module(OLDEST_OPEN_AGE_SENSOR, module),
+    )
+
+
+def backlog_age_descriptions(
+    coordinator: TOPdeskDataUpdateCoordinator,
+) -> list[TOPdeskSensorEntityDescription]:
+    """Return a sensor description per configured backlog age bucket."""
+    prefix = coordinator.backlog_bucket_prefix
+    return [
+        TOPdeskSensorEntityDescription(
+            key=age_bucket_key(prefix, days),
+            translation_key=prefix,
+            state_class=SensorStateClass.MEASUREMENT,
+            icon="mdi:clock-alert-outline",
+            age_days=days,
+            value_fn=lambda self: self.coordinator.data.get(
+                self.entity_description.key
+            ),
+        )
+        for days in coordinator.backlog_age_days
+    ]
+
+
+def trend_sensors(module: TOPdeskModule) -> tuple[TOPdeskSensorEntityDescription, ...]:
+    """
+    Return the rate and forecast sensors of a module.
+
+    They are derived from successive refreshes of the today counters, without
+    queries of their own.
+    """
+    new_today = module.key(SENSOR_NEW_TODAY)
+    completed_today = module.key(SENSOR_COMPLETED_TODAY)
+    return tuple(
+        for_module(description, module)
+        for description in (
+            TOPdeskSensorEntityDescription(
+                key=SENSOR_ARRIVAL_RATE,
+                state_class=SensorStateClass.MEASUREMENT,
+                suggested_display_precision=1,
+                icon="mdi:trending-up",
+                value_fn=lambda self: current_rate(self.coordinator, new_today),
+                extra_attributes=lambda self: rate_attributes(
+                    self.coordinator.trends.get(new_today)
+                ),
+            ),
+            TOPdeskSensorEntityDescription(
+                key=SENSOR_COMPLETION_RATE,
+                state_class=SensorStateClass.MEASUREMENT,
+                suggested_display_precision=1,
+                icon="mdi:trending-down",
+                value_fn=lambda self: current_rate(self.coordinator, completed_today),
+                extra_attributes=lambda self: rate_attributes(
+                    self.coordinator.trends.get(completed_today)
+                ),
+            ),
+            TOPdeskSensorEntityDescription(
+                key=SENSOR_NEW_TODAY_FORECAST,
+                state_class=SensorStateClass.MEASUREMENT,
+                icon="mdi:crystal-ball",
+                value_fn=lambda self: end_of_day_forecast(self.coordinator, new_today),
+            ),
+        )
+    )
+
+
+def binary_sensors(
+    module: TOPdeskModule,
+) -> tuple[TOPdeskBinarySensorEntityDescription, ...]:
+    """Return the threshold alerts of a module."""
+    total = module.key(SENSOR_TOTAL_TICKETS)
+    completed = module.key(SENSOR_COMPLETED_TICKETS)
+    new_today = module.key(SENSOR_NEW_TODAY)
+    return tuple(
+        for_module(description, module)
+        for description in (
+            TOPdeskBinarySensorEntityDescription(
+                key=BINARY_SENSOR_BACKLOG,
+                device_class=BinarySensorDeviceClass.PROBLEM,
+                icon="mdi:tray-full",
+                value_fn=lambda data: open_tickets(data, total, completed),
+                threshold_option=CONF_BACKLOG_THRESHOLD,
+                default_threshold=DEFAULT_BACKLOG_THRESHOLD,
+            ),
+            TOPdeskBinarySensorEntityDescription(
+                key=BINARY_SENSOR_NEW_TODAY_RATE,
+                device_class=BinarySensorDeviceClass.PROBLEM,
+                icon="mdi:file-document-alert",
+                value_fn=lambda data: hourly_rate(data.get(new_today)),
+                threshold_option=CONF_NEW_TODAY_RATE_THRESHOLD,
+                default_threshold=DEFAULT_NEW_TODAY_RATE_THRESHOLD,
+            ),
+        )
+    )
+
+
+POLLING_SWITCH = SwitchEntityDescription(
+    key=SWITCH_POLLING,
+    entity_category=EntityCategory.CONFIG,
+    icon="mdi:sync",
+)
+
+TOPDESK_SENSORS: dict[str, tuple[TOPdeskSensorEntityDescription, ...]] = {
+    api_type: module_sensors(module) for api_type, module in MODULES.items()
+}
+
+TOPDESK_TREND_SENSORS: dict[str, tuple[TOPdeskSensorEntityDescription, ...]] = {
+    api_type: trend_sensors(module) for api_type, module in MODULES.items()
+}
+
+TOPDESK_DIAGNOSTIC_SENSORS: dict[str, tuple[TOPdeskSensorEntityDescription, ...]] = {
+    api_type: tuple(
+        for_module(description, module) for description in DIAGNOSTIC_SENSORS
+    )
+    for api_type, module in MODULES.items()
+}
+
+TOPDESK_BINARY_SENSORS: dict[str, tuple[TOPdeskBinarySensorEntityDescription, ...]] = {
+    api_type: binary_sensors(module) for api_type, module in MODULES.items()
+}
+
+TOPDESK_POLLING_SWITCHES: dict[str, SwitchEntityDescription] = {
+    api_type: for_module(POLLING_SWITCH, module) for api_type, module in MODULES.items()
+}
@@ -0,0 +1,205 @@
+"""
+Diagnostics for TOPdesk Statistics integration.
+
+topdesk_stats/diagnostics.py
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.const import CONF_WEBHOOK_ID
+
+from .cache import RESPONSE_CACHE
+from .const import (
+    CONF_INSTANCE_HOST,
+    CONF_INSTANCE_NAME,
+    CONF_INSTANCE_PASSWORD,
+    CONF_INSTANCE_USERNAME,
+    DOMAIN,
+    HEDGE_PERCENTILE,
+    REFRESH_DEADLINE,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
+    from .api import TOPdeskAPI
+    from .coordinator import TOPdeskDataUpdateCoordinator
+
+TO_REDACT = {
+    CONF_INSTANCE_HOST,
+    CONF_INSTANCE_NAME,
+    CONF_INSTANCE_PASSWORD,
+    CONF_INSTANCE_USERNAME,
+    CONF_WEBHOOK_ID,
+}
+
+
+def _seconds(interval: Any) -> float | None:
+    """Return a timedelta in seconds."""
+    return interval.total_seconds() if interval is not None else None
+
+
+def _finite(value: float) -> float | None:
+    """Return None instead of infinity, which JSON can't represent."""
+    return value if value != float("inf") else None
+
+
+def _redact_text(text: str | None, coordinator: TOPdeskDataUpdateCoordinator) -> Any:
+    """Remove the host and instance name from an error message."""
+    if text is None:
+        return None
+    for secret in (coordinator.api.host, coordinator.api.instance_name):
+        if secret:
+            text = text.replace(secret, REDACTED)
+    return text
+
+
+def _refresh_history(coordinator: TOPdeskDataUpdateCoordinator) -> list[dict]:
+    """Return the recent refreshes, oldest first."""
+    history = []
+    for record in coordinator.refresh_history:
+        item = asdict(record)
+        item["started"] = record.started.isoformat()
+        item["duration"] = round(record.duration, 3)
+        item["loop_time"] = round(record.loop_time, 4)
+        item["error"] = _redact_text(record.error, coordinator)
+        history.append(item)
+    return history
+
+
+def _session_diagnostics(api: TOPdeskAPI) -> dict[str, Any]:
+    """Return how well sessions and requests are reused."""
+    client = api.client
+    if client is None:
+        return {
+            "shared": False,
+            "sessions_opened": api.sessions_opened,
+            "requests_per_session": (
+                round(api.request_count / api.sessions_opened, 2)
+                if api.sessions_opened
+                else None
+            ),
+        }
+
+    # The counters cover every entry using the client
+    return {
+        "shared": True,
+        "entries": client.users,
+        "sessions_opened": client.sessions_opened,
+        "requests": client.requests,
+        "shared_requests": client.shared,
+        "requests_per_session": (
+            round(client.requests / client.sessions_opened, 2)
+            if client.sessions_opened
+            else None
+        ),
+    }
+
+
+def _latency_diagnostics(api: TOPdeskAPI) -> dict[str, Any]:
+    """Return the request latencies, to tune intervals and the deadline."""
+    percentiles = {
+        name: api.latency_percentile(fraction)
+        for name, fraction in (("p50", 0.5), ("p95", HEDGE_PERCENTILE))
+    }
+    return {
+        "samples": len(api.latencies),
+        **{
+            name: round(value, 3) if value is not None else None
+            for name, value in percentiles.items()
+        },
+        "refresh_deadline": REFRESH_DEADLINE,
+        "timeouts": api.timeouts,
+        "hedged": api.hedged,
+        "hedges_won": api.hedges_won,
+    }
+
+
+def _coordinator_diagnostics(
+    coordinator: TOPdeskDataUpdateCoordinator,
+) -> dict[str, Any]:
+    """Return the performance picture of one module."""
+    api = coordinator.api
+    filters = api.metric_filters()
+    failed = {key for record in coordinator.refresh_history for key in record.failed}
+    budget = api.budget
+
+    return {
+        "polling_enabled": coordinator.polling_enabled,
+        "last_update_success": coordinator.last_update_success,
+        "intervals": {
+            "update_interval": _seconds(coordinator.update_interval),
+            "polling_interval": _seconds(coordinator.polling_interval),
+            "tiers": {
+                tier: _seconds(interval)
+                for tier, interval in coordinator.tier_intervals.items()
+            },
+            "metric_tiers": coordinator.metric_tiers,
+        },
+        "data": coordinator.data,
+        "metric_updated": {
+            key: updated.isoformat()
+            for key, updated in coordinator.metric_updated.items()
+        },
+        # The queries behind the metrics that failed recently
+        "failed_queries": {key: filters.get(key) for key in sorted(failed)},
+        "refresh_loop_time": coordinator.refresh_loop_time,
+        "refresh_history": _refresh_history(coordinator),
+        "api": {
+            "version": api.instance_version,
+            "capabilities": api.capabilities,
+            "requests": api.request_count,
+            "bytes_received": api.bytes_received,
+            "loop_time": round(api.loop_time, 4),
+        },
+        "latency": _latency_diagnostics(api),
+        "session": _session_diagnostics(api),
+        "budget": (
+            {
+                "max_per_hour": budget.max_per_hour,
+                "max_per_day": budget.max_per_day,
+                "used_past_hour": budget.used_hour(),
+                "used_today": budget.used_day(),
+                "remaining": budget.remaining(),
+                "stretch_factor": _finite(budget.stretch_factor()),
+            }
+            if budget is not None and budget.limited
+            else None
+        ),
+        "snapshot": {
+            "tickets": len(coordinator.snapshot),
+            "memory_usage": coordinator.snapshot.memory_usage(),
+        },
+    }
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinators = hass.data.get(DOMAIN, {}).get("coordinators", {})
+    lookups = RESPONSE_CACHE.hits + RESPONSE_CACHE.misses
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        # The response cache is shared by all instances
+        "response_cache": {
+            "entries": len(RESPONSE_CACHE),
+            "max_entries": RESPONSE_CACHE.max_entries,
+            "hits": RESPONSE_CACHE.hits,
+            "misses": RESPONSE_CACHE.misses,
+            "hit_rate": round(RESPONSE_CACHE.hits / lookups, 3) if lookups else None,
+        },
+        "modules": {
+            api_type: _coordinator_diagnostics(coordinator)
+            for api_type, coordinator in coordinators.get(entry.entry_id, {}).items()
+        },
+    }
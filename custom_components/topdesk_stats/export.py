@@ -0,0 +1,183 @@
+"""
+Export service for TOPdesk Statistics integration.
+
+topdesk_stats/export.py
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+import voluptuous as vol
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .api import get_past_date
+from .const import (
+    CONF_DAYS,
+    CONF_FILENAME,
+    CONF_FORMAT,
+    CONF_INSTANCE_NAME,
+    CONF_MODULE,
+    DOMAIN,
+    EVENT_EXPORT_PROGRESS,
+)
+from .coordinator import get_instance_coordinators
+from .modules import ALL_TICKETS_FILTER, MODULE_API_TYPES
+
+if TYPE_CHECKING:
+    from io import TextIOWrapper
+
+    from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_JSONL = "jsonl"
+
+EXPORT_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_INSTANCE_NAME): cv.string,
+        vol.Required(CONF_MODULE): vol.In(list(MODULE_API_TYPES)),
+        vol.Optional(CONF_FORMAT, default=EXPORT_FORMAT_CSV): vol.In(
+            [EXPORT_FORMAT_CSV, EXPORT_FORMAT_JSONL]
+        ),
+        vol.Optional(CONF_DAYS): cv.positive_int,
+        vol.Optional(CONF_FILENAME): cv.string,
+    }
+)
+
+
+class ExportWriter:
+    """Writes pages of records to a CSV or JSON Lines file."""
+
+    def __init__(self, path: Path, export_format: str, fields: tuple[str, ...]) -> None:
+        """Initialize the writer, the file is opened by open()."""
+        self.path = path
+        self.export_format = export_format
+        self.fields = fields
+        self._file: TextIOWrapper | None = None
+        self._csv: csv.DictWriter | None = None
+
+    def open(self) -> None:
+        """Create the file and write the CSV header."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("w", newline="", encoding="utf-8")
+        if self.export_format == EXPORT_FORMAT_CSV:
+            self._csv = csv.DictWriter(
+                self._file, fieldnames=self.fields, extrasaction="ignore"
+            )
+            self._csv.writeheader()
+
+    def write(self, records: list[dict[str, Any]]) -> None:
+        """Append a page of records to the file."""
+        if self._file is None:
+            msg = "Export file is not opened"
+            raise RuntimeError(msg)
+
+        if self._csv is not None:
+            self._csv.writerows(records)
+        else:
+            self._file.writelines(
+                json.dumps({field: record.get(field) for field in self.fields}) + "\n"
+                for record in records
+            )
+
+    def close(self) -> None:
+        """Close the file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """Close and remove the file of an export that didn't complete."""
+        # A file that couldn't be opened was never written, and may not be ours
+        if self._file is None:
+            return
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+async def async_export_statistics(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Stream the tickets of one module to a file in the config directory."""
+    instance_name = call.data[CONF_INSTANCE_NAME]
+    module = call.data[CONF_MODULE]
+    export_format = call.data[CONF_FORMAT]
+    api_type = MODULE_API_TYPES[module]
+
+    coordinator = get_instance_coordinators(hass, instance_name).get(api_type)
+    if coordinator is None:
+        msg = f"No {module} found for instance: {instance_name}"
+        raise HomeAssistantError(msg)
+
+    # Only a file name is accepted, exports always go to <config>/topdesk_stats/
+    filename = Path(call.data.get(CONF_FILENAME) or "").name or (
+        f"{slugify(instance_name)}_{module}_"
+        f"{dt_util.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    )
+    path = Path(hass.config.path(DOMAIN, filename))
+
+    if days := call.data.get(CONF_DAYS):
+        filter_query = f"(creationDate ge {get_past_date(days)})"
+    else:
+        filter_query = ALL_TICKETS_FILTER
+
+    fields = coordinator.module.export_fields
+    writer = ExportWriter(path, export_format, fields)
+    rows = 0
+    pages = 0
+
+    _LOGGER.info("Exporting %s of %s to %s", module, instance_name, path)
+    completed = False
+    try:
+        await hass.async_add_executor_job(writer.open)
+        async with aiohttp.ClientSession() as session:
+            async for records in coordinator.api.iter_pages(
+                session, filter_query, ",".join(fields)
+            ):
+                # File I/O and serialisation stay off the event loop
+                await hass.async_add_executor_job(writer.write, records)
+                rows += len(records)
+                pages += 1
+                hass.bus.async_fire(
+                    EVENT_EXPORT_PROGRESS,
+                    {
+                        CONF_INSTANCE_NAME: instance_name,
+                        CONF_MODULE: module,
+                        "path": str(path),
+                        "pages": pages,
+                        "rows": rows,
+                        "done": False,
+                    },
+                )
+        completed = True
+    except (aiohttp.ClientError, TimeoutError, OSError) as err:
+        msg = f"Export of {module} for {instance_name} failed: {err}"
+        raise HomeAssistantError(msg) from err
+    finally:
+        # A partial export would look like a complete one with fewer tickets
+        await hass.async_add_executor_job(writer.close if completed else writer.discard)
+
+    hass.bus.async_fire(
+        EVENT_EXPORT_PROGRESS,
+        {
+            CONF_INSTANCE_NAME: instance_name,
+            CONF_MODULE: module,
+            "path": str(path),
+            "pages": pages,
+            "rows": rows,
+            "done": True,
+        },
+    )
+    _LOGGER.info("Exported %d %s of %s to %s", rows, module, instance_name, path)
+
+    return {"path": str(path), "rows": rows}
@@ -0,0 +1,201 @@
+"""
+Module registry for TOPdesk Statistics integration.
+
+topdesk_stats/modules.py
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .const import (
+    API_CHANGE_TYPE,
+    API_INCIDENT_TYPE,
+    API_OPERATIONS_TYPE,
+    API_PROBLEM_TYPE,
+    API_REPORTING_BASE_PATH,
+    CONF_ENABLE_CHANGES,
+    CONF_ENABLE_INCIDENTS,
+    CONF_ENABLE_OPERATIONS,
+    CONF_ENABLE_PROBLEMS,
+    SENSOR_CLOSED_TICKETS,
+    SENSOR_COMPLETED_TICKETS,
+    SENSOR_COMPLETED_TODAY,
+    SENSOR_NEW_TODAY,
+    SENSOR_TOTAL_TICKETS,
+    WEBHOOK_EVENT_CLOSED,
+    WEBHOOK_EVENT_COMPLETED,
+    WEBHOOK_EVENT_CREATED,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+_LOGGER = logging.getLogger(__name__)
+
+ALL_TICKETS_FILTER = "(creationDate gt 1970-01-01T00:00:00Z)"
+
+
+@dataclass(frozen=True, slots=True)
+class TOPdeskModule:
+    """
+    A TOPdesk module, with its endpoint, fields and metrics.
+
+    Everything that differs between modules is declared here, so the API,
+    coordinator and platforms handle every module through the same code: a
+    module is added by adding an entry to MODULES, its translations and an
+    option to enable it.
+    """
+
+    api_type: str  # eg. "Incident Management", also names the device
+    name: str  # eg. "incidents", as used in service calls and webhook payloads
+    prefix: str  # eg. "incident", prepended to the keys of its entities
+    entity_set: str  # OData entity set of the reporting API
+    enable_option: str
+    # OData filter of each metric, {today} and {week_ago} are filled in
+    metrics: Mapping[str, str]
+    open_filter: str  # Tickets that count towards the backlog
+    completion_field: str  # Date a ticket was completed
+    closed_field: str | None  # Flag set once a ticket is closed, if any
+    export_fields: tuple[str, ...]
+    # Counter changes per webhook event: (always, only when created today)
+    webhook_deltas: Mapping[str, tuple[Mapping[str, int], Mapping[str, int]]] = field(
+        default_factory=dict
+    )
+    enabled_by_default: bool = True
+
+    def key(self, name: str) -> str:
+        """Return the key of an entity or metric of this module."""
+        return f"{self.prefix}_{name}"
+
+    def base_url(self, host: str) -> str:
+        """Return the URL of the entity set on a host."""
+        return f"{host}{API_REPORTING_BASE_PATH}{self.entity_set}/"
+
+    def metric_filters(self, today: str, week_ago: str) -> dict[str, str]:
+        """Return the OData filter of each metric, by key."""
+        return {
+            self.key(metric): template.format(today=today, week_ago=week_ago)
+            for metric, template in self.metrics.items()
+        }
+
+    @property
+    def snapshot_fields(self) -> str:
+        """Return the $select of the fields kept in the ticket snapshot."""
+        closed = (self.closed_field,) if self.closed_field else ()
+        return ",".join(("id", "creationDate", self.completion_field, *closed))
+
+
+INCIDENTS = TOPdeskModule(
+    api_type=API_INCIDENT_TYPE,
+    name="incidents",
+    prefix="incident",
+    entity_set="Incidents",
+    enable_option=CONF_ENABLE_INCIDENTS,
+    metrics={
+        SENSOR_TOTAL_TICKETS: ALL_TICKETS_FILTER,
+        SENSOR_COMPLETED_TICKETS: "(completed eq true)",
+        SENSOR_CLOSED_TICKETS: "(completed eq true) and (closed eq true)",
+        SENSOR_NEW_TODAY: "(creationDate ge {today})",
+        SENSOR_COMPLETED_TODAY: (
+            "(creationDate ge {today}) and (completed eq true) and (closed eq false)"
+        ),
+    },
+    open_filter="(completed eq false)",
+    completion_field="completedDate",
+    closed_field="closed",
+    export_fields=("id", "creationDate", "completed", "closed"),
+    webhook_deltas={
+        WEBHOOK_EVENT_CREATED: ({SENSOR_TOTAL_TICKETS: 1, SENSOR_NEW_TODAY: 1}, {}),
+        WEBHOOK_EVENT_COMPLETED: (
+            {SENSOR_COMPLETED_TICKETS: 1},
+            {SENSOR_COMPLETED_TODAY: 1},
+        ),
+        WEBHOOK_EVENT_CLOSED: (
+            {SENSOR_CLOSED_TICKETS: 1},
+            {SENSOR_COMPLETED_TODAY: -1},
+        ),
+    },
+)
+
+CHANGES = TOPdeskModule(
+    api_type=API_CHANGE_TYPE,
+    name="changes",
+    prefix="change",
+    entity_set="Changes",
+    enable_option=CONF_ENABLE_CHANGES,
+    metrics={
+        SENSOR_TOTAL_TICKETS: ALL_TICKETS_FILTER,
+        SENSOR_COMPLETED_TICKETS: "(closed eq true)",
+        SENSOR_CLOSED_TICKETS: "(closed eq true) and (closureDate lt {week_ago})",
+        SENSOR_NEW_TODAY: "(creationDate ge {today})",
+        SENSOR_COMPLETED_TODAY: "(creationDate ge {today}) and (closed eq true)",
+    },
+    open_filter="(closed eq false)",
+    completion_field="closureDate",
+    closed_field="closed",
+    export_fields=("id", "creationDate", "closed", "closureDate"),
+    webhook_deltas={
+        WEBHOOK_EVENT_CREATED: ({SENSOR_TOTAL_TICKETS: 1, SENSOR_NEW_TODAY: 1}, {}),
+        WEBHOOK_EVENT_COMPLETED: ({}, {}),
+        WEBHOOK_EVENT_CLOSED: (
+            {SENSOR_COMPLETED_TICKETS: 1},
+            {SENSOR_COMPLETED_TODAY: 1},
+        ),
+    },
+)
+
+# Problems are completed and then closed, like incidents
+PROBLEMS = TOPdeskModule(
+    api_type=API_PROBLEM_TYPE,
+    name="problems",
+    prefix="problem",
+    entity_set="Problems",
+    enable_option=CONF_ENABLE_PROBLEMS,
+    metrics=INCIDENTS.metrics,
+    open_filter="(completed eq false)",
+    completion_field="completedDate",
+    closed_field="closed",
+    export_fields=("id", "creationDate", "completed", "closed", "completedDate"),
+    webhook_deltas=INCIDENTS.webhook_deltas,
+    enabled_by_default=False,
+)
+
+# Operational activities are resolved or skipped, they are never closed
+OPERATIONAL_ACTIVITIES = TOPdeskModule(
+    api_type=API_OPERATIONS_TYPE,
+    name="operational_activities",
+    prefix="operational_activity",
+    entity_set="OperationalActivities",
+    enable_option=CONF_ENABLE_OPERATIONS,
+    metrics={
+        SENSOR_TOTAL_TICKETS: ALL_TICKETS_FILTER,
+        SENSOR_COMPLETED_TICKETS: "(resolved eq true)",
+        SENSOR_NEW_TODAY: "(creationDate ge {today})",
+        SENSOR_COMPLETED_TODAY: "(creationDate ge {today}) and (resolved eq true)",
+    },
+    open_filter="(resolved eq false) and (skipped eq false)",
+    completion_field="resolvedDate",
+    closed_field=None,
+    export_fields=("id", "creationDate", "resolved", "resolvedDate", "skipped"),
+    webhook_deltas={
+        WEBHOOK_EVENT_CREATED: ({SENSOR_TOTAL_TICKETS: 1, SENSOR_NEW_TODAY: 1}, {}),
+        WEBHOOK_EVENT_COMPLETED: (
+            {SENSOR_COMPLETED_TICKETS: 1},
+            {SENSOR_COMPLETED_TODAY: 1},
+        ),
+        WEBHOOK_EVENT_CLOSED: ({}, {}),
+    },
+    enabled_by_default=False,
+)
+
+# Every supported module, by API type
+MODULES: dict[str, TOPdeskModule] = {
+    module.api_type: module
+    for module in (INCIDENTS, CHANGES, PROBLEMS, OPERATIONAL_ACTIVITIES)
+}
+
+# Module names as used in service calls
+MODULE_API_TYPES = {module.name: module.api_type for module in MODULES.values()}
@@ -0,0 +1,193 @@
+"""
+Refresh profiling for TOPdesk Statistics integration.
+
+topdesk_stats/profiling.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .const import (
+    CONF_FILENAME,
+    CONF_HOTSPOTS,
+    CONF_INSTANCE_NAME,
+    DEFAULT_PROFILE_HOTSPOTS,
+    DOMAIN,
+    PROFILE_REPORT_LINES,
+)
+from .coordinator import get_instance_coordinators
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+
+    from .coordinator import TOPdeskDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_INSTANCE_NAME): cv.string,
+        vol.Optional(CONF_HOTSPOTS, default=DEFAULT_PROFILE_HOTSPOTS): vol.All(
+            cv.positive_int, vol.Range(min=1, max=100)
+        ),
+        vol.Optional(CONF_FILENAME): cv.string,
+    }
+)
+
+
+def _phase_times(coordinator: TOPdeskDataUpdateCoordinator) -> dict[str, float]:
+    """Return the seconds a coordinator spent in each phase so far."""
+    return {
+        "http": coordinator.api.request_time,
+        "json": coordinator.api.parse_time,
+        "registry": coordinator.registry_time,
+        "entity_updates": coordinator.listener_time,
+    }
+
+
+def _function_name(function: tuple[str, int, str]) -> str:
+    """Return a profiled function as module/file.py:line(name)."""
+    filename, line, name = function
+    if filename == "~":  # Built-in function
+        return name
+    path = Path(filename)
+    return f"{path.parent.name}/{path.name}:{line}({name})"
+
+
+def _hotspots(stats: pstats.Stats, count: int) -> list[dict[str, Any]]:
+    """Return the functions that took the most time themselves."""
+    entries = sorted(
+        stats.stats.items(),
+        key=lambda item: item[1][2],
+        reverse=True,
+    )
+    return [
+        {
+            "function": _function_name(function),
+            "calls": calls,
+            "own_time": round(own_time, 4),
+            "cumulative_time": round(cumulative_time, 4),
+        }
+        for function, (_, calls, own_time, cumulative_time, _) in entries[:count]
+    ]
+
+
+def _write_profile(
+    profiler: cProfile.Profile,
+    path: Path,
+    summary: dict[str, Any],
+    count: int,
+) -> list[dict[str, Any]]:
+    """
+    Write the stats and a readable report, and return the hotspots.
+
+    The .prof file loads in pstats, snakeviz and similar viewers, the report
+    next to it holds the phase timings and the most expensive call paths.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(path)
+
+    report = io.StringIO()
+    report.write(
+        f"Refresh of {summary['instance_name']} took {summary['duration']:.3f} s\n\n"
+    )
+    for api_type, phases in summary["phases"].items():
+        report.write(f"{api_type}:\n")
+        report.writelines(
+            f"  {phase:<16}{seconds:>10.4f} s\n" for phase, seconds in phases.items()
+        )
+    report.write("\n")
+    stats = pstats.Stats(profiler, stream=report)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_REPORT_LINES)
+    path.with_suffix(".txt").write_text(report.getvalue(), encoding="utf-8")
+
+    return _hotspots(stats, count)
+
+
+async def async_profile_refresh(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """
+    Run one refresh of every module of an instance under the profiler.
+
+    The profiler only sees the event loop thread, including whatever else runs
+    on the loop meanwhile, so it is combined with the time each module spent
+    per phase. Responses decoded in the executor show up in the json
+    phase only, and the http and json phases are summed over the concurrent
+    requests of a module, so they can add up to more than the duration.
+    """
+    instance_name = call.data[CONF_INSTANCE_NAME]
+    coordinators = get_instance_coordinators(hass, instance_name)
+    if not coordinators:
+        msg = f"No instance found with name: {instance_name}"
+        raise HomeAssistantError(msg)
+
+    # Only a file name is accepted, profiles always go to <config>/topdesk_stats/
+    filename = Path(call.data.get(CONF_FILENAME) or "").stem or (
+        f"{slugify(instance_name)}_profile_{dt_util.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+    path = Path(hass.config.path(DOMAIN, f"{filename}.prof"))
+
+    before = {
+        api_type: _phase_times(coordinator)
+        for api_type, coordinator in coordinators.items()
+    }
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as err:
+        msg = f"Another profiler is already running: {err}"
+        raise HomeAssistantError(msg) from err
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(coordinator.async_full_refresh() for coordinator in coordinators.values())
+        )
+    finally:
+        profiler.disable()
+    duration = time.perf_counter() - start
+
+    summary = {
+        "instance_name": instance_name,
+        "duration": duration,
+        "phases": {
+            api_type: {
+                phase: round(seconds - before[api_type][phase], 4)
+                for phase, seconds in _phase_times(coordinator).items()
+            }
+            for api_type, coordinator in coordinators.items()
+        },
+    }
+    hotspots = await hass.async_add_executor_job(
+        _write_profile, profiler, path, summary, call.data[CONF_HOTSPOTS]
+    )
+    _LOGGER.info(
+        "Profiled a refresh of %s in %.3f s to %s", instance_name, duration, path
+    )
+
+    return {
+        "path": str(path),
+        "report_path": str(path.with_suffix(".txt")),
+        "duration": round(duration, 4),
+        "success": {
+            api_type: coordinator.last_update_success
+            for api_type, coordinator in coordinators.items()
+        },
+        "phases": summary["phases"],
+        "hotspots": hotspots,
+    }
@@ -0,0 +1,419 @@
+"""
+Traffic recording and replay for TOPdesk Statistics integration.
+
+topdesk_stats/recording.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+import urllib.parse
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Self
+
+import aiohttp
+import voluptuous as vol
+from aiohttp import hdrs
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+from homeassistant.util.json import json_loads
+from multidict import CIMultiDict
+from yarl import URL
+
+from .const import (
+    CONF_DURATION,
+    CONF_FILENAME,
+    CONF_INSTANCE_NAME,
+    DEFAULT_RECORD_DURATION,
+    DOMAIN,
+    STATUS_304,
+    STATUS_400,
+    STATUS_404,
+)
+from .coordinator import get_instance_coordinators
+
+if TYPE_CHECKING:
+    from datetime import datetime
+    from io import TextIOWrapper
+
+    from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+
+_LOGGER = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+HOST_PLACEHOLDER = "{host}"
+
+# Recorded headers, the Authorization header is never written
+RECORDED_HEADERS = (hdrs.CONTENT_TYPE, hdrs.ETAG, hdrs.LAST_MODIFIED)
+
+# Dates in queries change every day, so replays match them as any date
+ODATA_DATE = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z")
+
+RECORD_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_INSTANCE_NAME): cv.string,
+        vol.Optional(CONF_DURATION, default=DEFAULT_RECORD_DURATION): vol.All(
+            cv.positive_int, vol.Range(max=1440)
+        ),
+        vol.Optional(CONF_FILENAME): cv.string,
+    }
+)
+
+
+def _match_key(method: str, path: str) -> tuple[str, str]:
+    """Return the key a request is replayed by."""
+    return method, ODATA_DATE.sub("<date>", urllib.parse.unquote(path))
+
+
+class RecordedResponse:
+    """A response read in full, as recorded or replayed."""
+
+    def __init__(
+        self, method: str, url: str, status: int, headers: CIMultiDict, body: bytes
+    ) -> None:
+        """Initialize the response."""
+        self.method = method
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    async def read(self) -> bytes:
+        """Return the body."""
+        return self._body
+
+    async def text(self) -> str:
+        """Return the body as text."""
+        return self._body.decode("utf-8", errors="replace")
+
+    async def json(self, **_kwargs: Any) -> Any:
+        """Return the decoded JSON body."""
+        return json_loads(self._body)
+
+    def raise_for_status(self) -> None:
+        """Raise ClientResponseError for an error status."""
+        if self.status >= STATUS_400:
+            url = URL(self.url)
+            raise aiohttp.ClientResponseError(
+                aiohttp.RequestInfo(url, self.method, CIMultiDict(), url),
+                (),
+                status=self.status,
+                message=f"Replayed {self.method} {self.url}",
+            )
+
+
+class TrafficRecorder:
+    """
+    Writes the requests and responses of an instance to a JSON Lines file.
+
+    The first line describes the recording, every next line is one exchange:
+    method, URL relative to the host, status, timing, a few headers and the
+    body. The host is replaced by a placeholder and credentials are never
+    written, so a recording can be shared to reproduce a problem offline.
+    Lines are serialised and written in the executor.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the recorder, the file is opened by async_open()."""
+        self.path = path
+        self.exchanges = 0
+        self._file: TextIOWrapper | None = None
+        self._lock = threading.Lock()
+
+    def wrap(self, session: aiohttp.ClientSession, host: str) -> RecordingSession:
+        """Return a session that records the requests sent through session."""
+        return RecordingSession(session, self, host)
+
+    async def async_open(self, capabilities: dict[str, Any]) -> None:
+        """Create the file and write the description of the recording."""
+        header = {
+            "recording": RECORDING_VERSION,
+            "started": dt_util.utcnow().isoformat(),
+            "capabilities": capabilities,
+        }
+        await asyncio.get_running_loop().run_in_executor(None, self._open, header)
+
+    def _open(self, header: dict[str, Any]) -> None:
+        """Create the file, runs in the executor."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("w", encoding="utf-8")
+        self._file.write(json.dumps(header) + "\n")
+
+    async def async_record(
+        self,
+        host: str,
+        method: str,
+        url: str,
+        response: RecordedResponse,
+        elapsed: float,
+    ) -> None:
+        """Write one exchange, with the host redacted."""
+        exchange = {
+            "method": method,
+            "url": url.removeprefix(host),
+            "status": response.status,
+            "elapsed": round(elapsed, 4),
+            "headers": {
+                header: response.headers[header]
+                for header in RECORDED_HEADERS
+                if header in response.headers
+            },
+            "body": (await response.text()).replace(host, HOST_PLACEHOLDER),
+        }
+        self.exchanges += 1
+        await asyncio.get_running_loop().run_in_executor(None, self._write, exchange)
+
+    def _write(self, exchange: dict[str, Any]) -> None:
+        """Append an exchange, runs in the executor."""
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps(exchange) + "\n")
+
+    async def async_close(self) -> None:
+        """Close the file."""
+        await asyncio.get_running_loop().run_in_executor(None, self._close)
+
+    def _close(self) -> None:
+        """Close the file, runs in the executor."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RecordingSession:
+    """Sends requests through a real session and records every exchange."""
+
+    def __init__(
+        self, session: aiohttp.ClientSession, recorder: TrafficRecorder, host: str
+    ) -> None:
+        """Initialize the session."""
+        self._session = session
+        self._recorder = recorder
+        self._host = host
+
+    def get(self, url: str, **kwargs: Any) -> _RecordedRequest:
+        """Send a GET request."""
+        return _RecordedRequest(self, "GET", url, kwargs)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> _RecordedRequest:
+        """Send a request."""
+        return _RecordedRequest(self, method, url, kwargs)
+
+    async def async_send(
+        self, method: str, url: str, kwargs: dict[str, Any]
+    ) -> RecordedResponse:
+        """Send a request, read the whole response and record it."""
+        start = time.perf_counter()
+        async with self._session.request(method, url, **kwargs) as response:
+            recorded = RecordedResponse(
+                method,
+                url,
+                response.status,
+                CIMultiDict(response.headers),
+                await response.read(),
+            )
+        await self._recorder.async_record(
+            self._host, method, url, recorded, time.perf_counter() - start
+        )
+        return recorded
+
+
+class _RecordedRequest:
+    """Async context manager of a recorded request."""
+
+    def __init__(
+        self, session: RecordingSession, method: str, url: str, kwargs: dict[str, Any]
+    ) -> None:
+        """Initialize the request."""
+        self._session = session
+        self._method = method
+        self._url = url
+        self._kwargs = kwargs
+
+    async def __aenter__(self) -> RecordedResponse:
+        """Send the request."""
+        return await self._session.async_send(self._method, self._url, self._kwargs)
+
+    async def __aexit__(self, *excinfo: object) -> None:
+        """Release nothing, the body is already read."""
+
+
+class Recording:
+    """The exchanges of a recording, grouped by the request they answer."""
+
+    def __init__(self, capabilities: dict[str, Any], exchanges: list[dict]) -> None:
+        """Initialize the recording."""
+        self.capabilities = capabilities
+        self.exchanges: dict[tuple[str, str], list[dict]] = {}
+        for exchange in exchanges:
+            key = _match_key(exchange["method"], exchange["url"])
+            self.exchanges.setdefault(key, []).append(exchange)
+
+    @classmethod
+    def load(cls, path: Path) -> Self:
+        """Read a recording, does I/O so call it from the executor."""
+        with path.open(encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            if header.get("recording") != RECORDING_VERSION:
+                msg = f"{path} is not a recording of version {RECORDING_VERSION}"
+                raise ValueError(msg)
+            exchanges = [json.loads(line) for line in file if line.strip()]
+        return cls(header.get("capabilities", {}), exchanges)
+
+
+class ReplaySession:
+    """
+    Answers requests from a recording instead of the network.
+
+    Repeated identical requests get the recorded responses in order, and the
+    last one once they run out. A 304 is only replayed for a conditional
+    request. Each response is delayed by its recorded time times
+    latency_scale, so 0 replays as fast as possible.
+    """
+
+    def __init__(
+        self, recording: Recording, host: str, latency_scale: float = 1.0
+    ) -> None:
+        """Initialize the session."""
+        self.recording = recording
+        self.host = host.rstrip("/")
+        self.latency_scale = latency_scale
+        self.closed = False
+        self.unmatched = 0
+        self._positions: dict[tuple[str, str], int] = {}
+
+    def get(self, url: str, **kwargs: Any) -> _ReplayedRequest:
+        """Replay a GET request."""
+        return _ReplayedRequest(self, "GET", url, kwargs.get("headers") or {})
+
+    def request(self, method: str, url: str, **kwargs: Any) -> _ReplayedRequest:
+        """Replay a request."""
+        return _ReplayedRequest(self, method, url, kwargs.get("headers") or {})
+
+    async def async_replay(
+        self, method: str, url: str, headers: dict[str, str]
+    ) -> RecordedResponse:
+        """Return the recorded response to a request, after its delay."""
+        key = _match_key(method, url.removeprefix(self.host))
+        exchange = self._next_exchange(
+            key,
+            conditional=hdrs.IF_NONE_MATCH in headers
+            or hdrs.IF_MODIFIED_SINCE in headers,
+        )
+        if exchange is None:
+            self.unmatched += 1
+            _LOGGER.warning("No recorded response to %s %s", method, url)
+            return RecordedResponse(method, url, STATUS_404, CIMultiDict(), b"")
+
+        if self.latency_scale:
+            await asyncio.sleep(exchange["elapsed"] * self.latency_scale)
+        return RecordedResponse(
+            method,
+            url,
+            exchange["status"],
+            CIMultiDict(exchange["headers"]),
+            exchange["body"].replace(HOST_PLACEHOLDER, self.host).encode(),
+        )
+
+    def _next_exchange(
+        self, key: tuple[str, str], *, conditional: bool
+    ) -> dict[str, Any] | None:
+        """Return the next recorded exchange for a request."""
+        exchanges = self.recording.exchanges.get(key)
+        if not exchanges:
+            return None
+        # Onwards from the previous response, then back from the last one
+        position = self._positions.get(key, 0)
+        for index in (
+            *range(position, len(exchanges)),
+            *range(len(exchanges) - 1, -1, -1),
+        ):
+            exchange = exchanges[index]
+            if conditional or exchange["status"] != STATUS_304:
+                self._positions[key] = index + 1
+                return exchange
+        # Only 304s recorded, but nothing to validate against
+        return None
+
+    async def close(self) -> None:
+        """Close the session."""
+        self.closed = True
+
+
+class _ReplayedRequest:
+    """Async context manager of a replayed request."""
+
+    def __init__(
+        self, session: ReplaySession, method: str, url: str, headers: dict[str, str]
+    ) -> None:
+        """Initialize the request."""
+        self._session = session
+        self._method = method
+        self._url = url
+        self._headers = headers
+
+    async def __aenter__(self) -> RecordedResponse:
+        """Replay the request."""
+        return await self._session.async_replay(self._method, self._url, self._headers)
+
+    async def __aexit__(self, *excinfo: object) -> None:
+        """Release nothing, the body is already read."""
+
+
+async def async_record_traffic(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Record the API traffic of an instance for a while."""
+    instance_name = call.data[CONF_INSTANCE_NAME]
+    coordinators = get_instance_coordinators(hass, instance_name)
+    if not coordinators:
+        msg = f"No instance found with name: {instance_name}"
+        raise HomeAssistantError(msg)
+    if any(c.api.recorder is not None for c in coordinators.values()):
+        msg = f"The traffic of {instance_name} is already being recorded"
+        raise HomeAssistantError(msg)
+
+    # Only a file name is accepted, recordings always go to <config>/topdesk_stats/
+    filename = Path(call.data.get(CONF_FILENAME) or "").name or (
+        f"{slugify(instance_name)}_traffic_"
+        f"{dt_util.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    )
+    path = Path(hass.config.path(DOMAIN, filename))
+    duration = timedelta(minutes=call.data[CONF_DURATION])
+
+    recorder = TrafficRecorder(path)
+    await recorder.async_open(next(iter(coordinators.values())).api.capabilities)
+    for coordinator in coordinators.values():
+        coordinator.api.recorder = recorder
+    _LOGGER.info("Recording the traffic of %s to %s", instance_name, path)
+
+    async def async_stop(_now: datetime) -> None:
+        """Stop recording and close the file."""
+        for coordinator in coordinators.values():
+            if coordinator.api.recorder is recorder:
+                coordinator.api.recorder = None
+        await recorder.async_close()
+        _LOGGER.info(
+            "Recorded %d requests of %s to %s",
+            recorder.exchanges,
+            instance_name,
+            path,
+        )
+
+    async_call_later(hass, duration, async_stop)
+
+    # Start with every metric and the version, so the recording is complete
+    for coordinator in coordinators.values():
+        await coordinator.async_request_full_refresh()
+
+    return {"path": str(path), "until": (dt_util.now() + duration).isoformat()}
@@ -14,17 +14,18 @@ from homeassistant.components.sensor.const import SensorStateClass
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
 )
+from homeassistant.util import dt as dt_util
 
 from .const import (
-    API_CHANGE_TYPE,
-    API_INCIDENT_TYPE,
     CONF_INSTANCE_NAME,
     DOMAIN,
 )
 from .definitions import (
-    TOPDESK_CHANGE_SENSORS,
-    TOPDESK_INCIDENT_SENSORS,
+    TOPDESK_DIAGNOSTIC_SENSORS,
+    TOPDESK_SENSORS,
+    TOPDESK_TREND_SENSORS,
     TOPdeskSensorEntityDescription,
+    backlog_age_descriptions,
 )
 
 if TYPE_CHECKING:
@@ -48,31 +49,30 @@ async def async_setup_entry(
 
     entities = []
 
-    # Setup incident sensors
-    coordinator_incidents = coordinators[API_INCIDENT_TYPE]
-    for description in TOPDESK_INCIDENT_SENSORS:
-        if description.exists_fn(coordinator_incidents):
-            entities.append(
-                TOPdeskSensor(coordinator_incidents, description, instance_name)
-            )
-            _LOGGER.debug(
-                "Added incident sensor %s for instance %s",
-                description.key,
-                instance_name,
-            )
-
-    # Setup change sensors
-    coordinator_changes = coordinators[API_CHANGE_TYPE]
-    for description in TOPDESK_CHANGE_SENSORS:
-        if description.exists_fn(coordinator_changes):
-            entities.append(
-                TOPdeskSensor(coordinator_changes, description, instance_name)
-            )
-            _LOGGER.debug(
-                "Added change sensor %s for instance %s",
-                description.key,
-                instance_name,
-            )
+    # Setup the sensors of each enabled module
+    for api_type, coordinator in coordinators.items():
+        for description in TOPDESK_SENSORS.get(api_type, ()):
+            if description.exists_fn(coordinator):
+                entities.append(TOPdeskSensor(coordinator, description, instance_name))
+                _LOGGER.debug(
+                    "Added %s sensor %s for instance %s",
+                    api_type,
+                    description.key,
+                    instance_name,
+                )
+        entities.extend(
+            TOPdeskBacklogAgeSensor(coordinator, description, instance_name)
+            for description in backlog_age_descriptions(coordinator)
+        )
+        entities.extend(
+            TOPdeskTrendSensor(coordinator, description, instance_name)
+            for description in TOPDESK_TREND_SENSORS.get(api_type, ())
+        )
+        entities.extend(
+            TOPdeskDiagnosticSensor(coordinator, description, instance_name)
+            for description in TOPDESK_DIAGNOSTIC_SENSORS.get(api_type, ())
+            if description.exists_fn(coordinator)
+        )
 
     async_add_entities(entities)
     _LOGGER.debug("Added %d sensors for instance %s", len(entities), instance_name)
@@ -109,15 +109,16 @@ class TOPdeskSensor(CoordinatorEntity, SensorEntity):
 
     @property
     def available(self) -> bool:
-        """Return availability based on last update success."""
-        return self.coordinator.last_update_success and getattr(
-            self.entity_description, "available_fn", False
-        )
+        """Return availability, a failed query keeps serving its last value."""
+        data = self.coordinator.data or {}
+        return data.get(
+            self.entity_description.key
+        ) is not None and self.entity_description.available_fn(self)
 
     @property
     def device_class(self) -> str:
         """Return the device class."""
-        return "count"
+        return self.entity_description.device_class or "count"
 
     @property
     def state_class(self) -> str:
@@ -127,7 +128,8 @@ class TOPdeskSensor(CoordinatorEntity, SensorEntity):
     @property
     def suggested_display_precision(self) -> int:
         """Return display precision."""
-        return 0
+        precision = self.entity_description.suggested_display_precision
+        return precision if precision is not None else 0
 
     @property
     def icon(self) -> str:
@@ -140,7 +142,16 @@ class TOPdeskSensor(CoordinatorEntity, SensorEntity):
         extra_attributes = getattr(
             self.entity_description, "extra_attributes", lambda _: {}
         )
-        return extra_attributes(self)
+        attributes = dict(extra_attributes(self))
+
+        # Tell how fresh the value is, it may be served from an earlier refresh
+        updated = self.coordinator.metric_updated.get(self.entity_description.key)
+        if updated is not None:
+            attributes["last_fetched"] = updated.isoformat()
+            attributes["age_seconds"] = int(
+                (dt_util.utcnow() - updated).total_seconds()
+            )
+        return attributes
 
     async def async_added_to_hass(self) -> None:
         """Handle entity addition to Home Assistant."""
@@ -151,3 +162,61 @@ class TOPdeskSensor(CoordinatorEntity, SensorEntity):
         """Manually trigger a refresh of the data for the sensor."""
         await self.coordinator.async_request_refresh()
         _LOGGER.debug("Sensor %s updated", self.unique_id)
+
+
+class TOPdeskBacklogAgeSensor(TOPdeskSensor):
+    """Represents the number of open tickets older than a number of days."""
+
+    def __init__(
+        self,
+        coordinator: TOPdeskDataUpdateCoordinator,
+        entity_description: TOPdeskSensorEntityDescription,
+        instance_name: str,
+    ) -> None:
+        """Initialize the sensor, all buckets share one translated name."""
+        super().__init__(coordinator, entity_description, instance_name)
+        self._attr_translation_key = entity_description.translation_key
+        self._attr_translation_placeholders = {"days": str(entity_description.age_days)}
+
+
+class TOPdeskTrendSensor(TOPdeskSensor):
+    """Represents a rate or forecast derived from the today counters."""
+
+    @property
+    def available(self) -> bool:
+        """Return availability, a rate needs a first refresh of its counter."""
+        return self.native_value is not None
+
+    @property
+    def device_class(self) -> str | None:
+        """Return the device class."""
+        return self.entity_description.device_class
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return entity specific state attributes."""
+        return dict(self.entity_description.extra_attributes(self))
+
+
+class TOPdeskDiagnosticSensor(TOPdeskSensor):
+    """Represents a sensor about the integration itself, not about tickets."""
+
+    @property
+    def available(self) -> bool:
+        """Return True, the value doesn't depend on a query."""
+        return True
+
+    @property
+    def device_class(self) -> str | None:
+        """Return the device class."""
+        return self.entity_description.device_class
+
+    @property
+    def suggested_display_precision(self) -> int | None:
+        """Return display precision."""
+        return self.entity_description.suggested_display_precision
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return entity specific state attributes."""
+        return dict(self.entity_description.extra_attributes(self))
@@ -6,4 +6,91 @@ topdesk_stats/switch.py
 
 from __future__ import annotations
 
-# to do
+import logging
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.switch import SwitchEntity
+from homeassistant.const import STATE_OFF
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import (
+    CONF_INSTANCE_NAME,
+    DOMAIN,
+)
+from .definitions import TOPDESK_POLLING_SWITCHES
+
+if TYPE_CHECKING:
+    from homeassistant.components.switch import SwitchEntityDescription
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+    from .coordinator import TOPdeskDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up a polling switch for each enabled module."""
+    coordinators = hass.data[DOMAIN]["coordinators"][config_entry.entry_id]
+    instance_name = config_entry.data[CONF_INSTANCE_NAME]
+
+    entities = [
+        TOPdeskPollingSwitch(coordinator, TOPDESK_POLLING_SWITCHES[api_type])
+        for api_type, coordinator in coordinators.items()
+        if api_type in TOPDESK_POLLING_SWITCHES
+    ]
+
+    async_add_entities(entities)
+    _LOGGER.debug("Added %d switches for instance %s", len(entities), instance_name)
+
+
+class TOPdeskPollingSwitch(CoordinatorEntity, SwitchEntity, RestoreEntity):
+    """Pauses and resumes polling of a module at runtime."""
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: TOPdeskDataUpdateCoordinator,
+        entity_description: SwitchEntityDescription,
+    ) -> None:
+        """Initialize TOPdesk polling switch."""
+        super().__init__(coordinator)
+        self.entity_description = entity_description
+        self._attr_device_info = getattr(coordinator, "device_info", None)
+        self._attr_unique_id = f"{coordinator.api.instance_name.lower().replace(' ', '_')}_{coordinator.api.device_id}_{entity_description.key}"  # noqa: E501
+        self._attr_translation_key = entity_description.key
+
+    @property
+    def available(self) -> bool:
+        """Return True, polling can be controlled even when updates fail."""
+        return True
+
+    @property
+    def is_on(self) -> bool:
+        """Return whether the module is polled."""
+        return self.coordinator.polling_enabled
+
+    async def async_turn_on(self, **kwargs: Any) -> None:  # noqa: ARG002
+        """Resume polling and catch up right away."""
+        self.coordinator.async_set_polling(enabled=True)
+        self.async_write_ha_state()
+        await self.coordinator.async_request_full_refresh()
+
+    async def async_turn_off(self, **kwargs: Any) -> None:  # noqa: ARG002
+        """Pause polling, the sensors keep their last values."""
+        self.coordinator.async_set_polling(enabled=False)
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Restore a paused state after a restart or reload."""
+        await super().async_added_to_hass()
+        last_state = await self.async_get_last_state()
+        if last_state is not None and last_state.state == STATE_OFF:
+            self.coordinator.async_set_polling(enabled=False)
@@ -0,0 +1,106 @@
+"""
+Rates and trends for TOPdesk Statistics integration.
+
+topdesk_stats/trends.py
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Self
+
+from .const import TREND_LONG_HALF_LIFE, TREND_SHORT_HALF_LIFE
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600  # seconds
+
+
+def _ewma(
+    average: float | None, sample: float, elapsed: float, half_life: float
+) -> float:
+    """
+    Return an exponentially weighted moving average after a new sample.
+
+    The weight of the sample grows with the time since the previous one, so
+    refreshes at irregular intervals, such as a manual refresh right after a
+    scheduled one, don't skew the average.
+    """
+    if average is None:
+        return sample
+    alpha = 1 - 0.5 ** (elapsed / half_life)
+    return average + alpha * (sample - average)
+
+
+@dataclass(slots=True)
+class RateTracker:
+    """
+    Rate per hour of a counter that starts at zero at local midnight.
+
+    Holds only the previous sample and two moving averages, so the state per
+    counter is constant and cheap to persist.
+    """
+
+    value: int | None = None
+    updated: float | None = None  # Epoch seconds of value
+    short_rate: float | None = None  # Per hour, TREND_SHORT_HALF_LIFE
+    long_rate: float | None = None  # Per hour, TREND_LONG_HALF_LIFE
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Self:
+        """Restore a tracker from storage."""
+        return cls(**{key: data.get(key) for key in cls.__slots__})
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state to store."""
+        return asdict(self)
+
+    def update(self, value: int, now: float, day_start: float) -> None:
+        """Add a sample of the counter, times are epoch seconds."""
+        previous, since = self.value, self.updated
+        if previous is None or since is None or since < day_start:
+            # The counter counts from midnight, also after a restart or rollover
+            previous, since = 0, day_start
+        self.value, self.updated = value, now
+
+        elapsed = now - since
+        if elapsed <= 0:
+            return
+        # A counter can drop when tickets are reclassified, that is no arrival
+        rate = max(0, value - previous) / elapsed * HOUR
+        self.short_rate = _ewma(
+            self.short_rate, rate, elapsed, TREND_SHORT_HALF_LIFE * 60
+        )
+        self.long_rate = _ewma(self.long_rate, rate, elapsed, TREND_LONG_HALF_LIFE * 60)
+
+    @property
+    def trend(self) -> float | None:
+        """Return how much faster the recent rate is than the long-term rate."""
+        if self.short_rate is None or self.long_rate is None:
+            return None
+        return self.short_rate - self.long_rate
+
+    def forecast(self, value: int | None, now: float, day_end: float) -> float | None:
+        """
+        Return the expected count at the end of the day.
+
+        The rest of the day is extrapolated at the long-term rate, which
+        follows the daily pattern too slowly to chase a single busy quarter.
+        """
+        if value is None or self.long_rate is None:
+            return None
+        return value + self.long_rate * max(0.0, day_end - now) / HOUR
+
+
+def rate_attributes(tracker: RateTracker | None) -> dict[str, float | None]:
+    """Return the long-term rate and trend of a tracker."""
+    if tracker is None:
+        return {}
+    trend = tracker.trend
+    return {
+        "long_term_rate": (
+            round(tracker.long_rate, 2) if tracker.long_rate is not None else None
+        ),
+        "trend": round(trend, 2) if trend is not None else None,
+    }
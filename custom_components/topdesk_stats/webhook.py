@@ -0,0 +1,116 @@
+"""
+Webhook receiver for TOPdesk Statistics integration.
+
+topdesk_stats/webhook.py
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import voluptuous as vol
+from aiohttp import web
+from homeassistant.components import webhook
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.core import callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.network import NoURLAvailableError
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_INSTANCE_NAME,
+    CONF_MODULE,
+    DOMAIN,
+    STATUS_400,
+    STATUS_404,
+    WEBHOOK_EVENT_CLOSED,
+    WEBHOOK_EVENT_COMPLETED,
+    WEBHOOK_EVENT_CREATED,
+)
+from .modules import MODULE_API_TYPES, MODULES
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_EVENT = "event"
+ATTR_CREATION_DATE = "creation_date"
+
+WEBHOOK_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_MODULE): vol.In(list(MODULE_API_TYPES)),
+        vol.Required(ATTR_EVENT): vol.In(
+            [WEBHOOK_EVENT_CREATED, WEBHOOK_EVENT_COMPLETED, WEBHOOK_EVENT_CLOSED]
+        ),
+        vol.Optional(ATTR_CREATION_DATE): cv.datetime,
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+
+@callback
+def async_setup_webhook(hass: HomeAssistant, entry: ConfigEntry) -> CALLBACK_TYPE:
+    """Register the webhook of an entry, returns the unregister callback."""
+    webhook_id = entry.options[CONF_WEBHOOK_ID]
+    instance_name = entry.data[CONF_INSTANCE_NAME]
+
+    async def async_handle_webhook(
+        hass: HomeAssistant, webhook_id: str, request: web.Request
+    ) -> web.Response:
+        """Update the coordinator data in place from a TOPdesk action sequence."""
+        try:
+            payload = WEBHOOK_SCHEMA(await request.json())
+        except (ValueError, vol.Invalid) as err:
+            _LOGGER.warning("Invalid webhook payload for %s: %s", instance_name, err)
+            return web.Response(status=STATUS_400, text=str(err))
+
+        api_type = MODULE_API_TYPES[payload[CONF_MODULE]]
+        coordinators = hass.data[DOMAIN]["coordinators"].get(entry.entry_id, {})
+        coordinator = coordinators.get(api_type)
+        if coordinator is None:
+            return web.Response(status=STATUS_404, text=f"{api_type} not enabled")
+
+        # The deltas mirror the metric filters of the module, counters that
+        # can't be derived from a single event are left to the reconciliation
+        module = MODULES[api_type]
+        always, today = module.webhook_deltas.get(payload[ATTR_EVENT], ({}, {}))
+        deltas = {module.key(metric): delta for metric, delta in always.items()}
+        creation_date = payload.get(ATTR_CREATION_DATE)
+        if (
+            creation_date is not None
+            and dt_util.as_local(creation_date).date() == dt_util.now().date()
+        ):
+            for metric, delta in today.items():
+                key = module.key(metric)
+                deltas[key] = deltas.get(key, 0) + delta
+
+        _LOGGER.debug(
+            "Webhook %s received %s for %s (%s): %s",
+            webhook_id,
+            payload[ATTR_EVENT],
+            instance_name,
+            api_type,
+            deltas,
+        )
+        coordinator.async_apply_deltas(deltas)
+        return web.Response()
+
+    webhook.async_register(
+        hass,
+        DOMAIN,
+        f"TOPdesk {instance_name}",
+        webhook_id,
+        async_handle_webhook,
+        allowed_methods=["POST"],
+    )
+
+    try:
+        url = webhook.async_generate_url(hass, webhook_id)
+    except NoURLAvailableError:
+        url = webhook.async_generate_path(webhook_id)
+    _LOGGER.info("Webhook for %s listening on %s", instance_name, url)
+
+    return lambda: webhook.async_unregister(hass, webhook_id)
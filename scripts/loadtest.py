@@ -0,0 +1,433 @@
+"""
+Load test for TOPdesk Statistics integration.
+
+scripts/loadtest.py
+
+Runs N instances of the real TOPdeskAPI and TOPdeskDataUpdateCoordinator stack
+against a local mock OData server, and reports how the event loop copes as N
+grows: loop lag, CPU time per refresh and memory. The mock server runs in its
+own process, so its CPU time isn't counted.
+
+Run it through scripts/loadtest, eg.:
+
+    scripts/loadtest --instances 1 10 25 50 100 --duration 60 --latency 0.2
+
+With --replay the instances are answered from a traffic recording, made with
+the record_traffic action, instead of the mock server:
+
+    scripts/loadtest --replay traffic.jsonl --latency-scale 0.5
+"""
+
+# ruff: noqa: INP001
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+    from topdesk_stats.coordinator import TOPdeskDataUpdateCoordinator
+
+LAG_PROBE_INTERVAL = 0.05  # seconds
+PAGE_LIMIT = 10000
+
+
+# -- Mock OData server, runs in a separate process ----------------------------
+
+
+def run_mock_server(
+    port: int, latency: float, jitter: float, tickets: int, *, count: bool
+) -> None:
+    """Serve the TOPdesk endpoints used by the integration."""
+    ids = [str(uuid.UUID(int=random.getrandbits(128))) for _ in range(tickets)]
+    now = time.time()
+    # Created up to 2**23 seconds (97 days) ago
+    created = [
+        time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - random.getrandbits(23)))
+        for _ in range(tickets)
+    ]
+
+    async def handle(request: web.Request) -> web.Response:
+        await asyncio.sleep(max(0.0, random.gauss(latency, jitter)))
+        query = request.query
+
+        if request.path.endswith("/tas/api/productVersion"):
+            return web.json_response({"major": 2025, "minor": 1, "patch": 0})
+        if request.path.endswith("$batch"):
+            return web.json_response({"responses": [{"id": "1", "status": 200}]})
+        if "$apply" in query:
+            return web.json_response({"value": [{"total": tickets}]})
+        if query.get("$count") == "true":
+            if not count:
+                return web.Response(status=400, text="$count is not supported")
+            return web.json_response({"@odata.count": tickets, "value": []})
+
+        # Without $count the integration transfers the ids of every ticket,
+        # the backlog age scan pages through creation dates
+        skip = int(query.get("$skip", 0))
+        top = int(query.get("$top", PAGE_LIMIT))
+        if "creationDate" in query.get("$select", ""):
+            records = [{"creationDate": date} for date in created[skip : skip + top]]
+        else:
+            records = [{"id": id_} for id_ in ids[skip : skip + top]]
+        return web.Response(
+            text=json.dumps({"value": records}), content_type="application/json"
+        )
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handle)
+    web.run_app(app, host="127.0.0.1", port=port, print=None, handle_signals=False)
+
+
+async def wait_for_server(url: str, max_wait: float = 10) -> None:
+    """Wait until the mock server accepts requests."""
+    deadline = time.monotonic() + max_wait
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(f"{url}/tas/api/productVersion"):
+                    return
+            except aiohttp.ClientError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+
+# -- Measurements --------------------------------------------------------------
+
+
+class LoopLagProbe:
+    """Measures how late the event loop wakes up a sleeping task."""
+
+    def __init__(self) -> None:
+        """Initialize the probe."""
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        """Sleep in a loop and record the oversleep."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            self.samples.append(time.perf_counter() - start - LAG_PROBE_INTERVAL)
+
+    def start(self) -> None:
+        """Start sampling."""
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+
+def current_rss() -> int:
+    """Return the resident memory of this process in bytes."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except (OSError, IndexError, ValueError):
+        # Peak instead of current memory, outside Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return pages * resource.getpagesize()
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Return a percentile of the samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+# -- Home Assistant -------------------------------------------------------------
+
+
+async def async_start_hass(config_dir: str) -> HomeAssistant:
+    """Start a bare Home Assistant with the registries the coordinator uses."""
+    from homeassistant import config_entries
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers import device_registry as dr
+
+    hass = HomeAssistant(config_dir)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await dr.async_load(hass)
+    return hass
+
+
+async def async_setup_instance(
+    hass: HomeAssistant,
+    url: str,
+    index: int,
+    interval: timedelta,
+    args: argparse.Namespace,
+) -> list[TOPdeskDataUpdateCoordinator]:
+    """Set up one instance the way async_setup_entry does, without platforms."""
+    from homeassistant.config_entries import ConfigEntry
+    from topdesk_stats.api import TOPdeskAPI
+    from topdesk_stats.const import (
+        CONF_CAPABILITIES,
+        CONF_INSTANCE_HOST,
+        CONF_INSTANCE_NAME,
+        CONF_INSTANCE_PASSWORD,
+        CONF_INSTANCE_USERNAME,
+        DOMAIN,
+    )
+    from topdesk_stats.coordinator import TOPdeskDataUpdateCoordinator
+    from topdesk_stats.modules import MODULES
+    from topdesk_stats.recording import ReplaySession
+
+    # Every instance gets its own host, so no responses are shared
+    data: dict[str, Any] = {
+        CONF_INSTANCE_HOST: f"{url}/tenant{index}",
+        CONF_INSTANCE_USERNAME: "loadtest",
+        CONF_INSTANCE_PASSWORD: "loadtest",
+        CONF_INSTANCE_NAME: f"Load test {index}",
+    }
+    if args.recording is not None:
+        data[CONF_CAPABILITIES] = args.recording.capabilities
+    else:
+        async with TOPdeskAPI(
+            data[CONF_INSTANCE_HOST],
+            data[CONF_INSTANCE_USERNAME],
+            data[CONF_INSTANCE_PASSWORD],
+            data[CONF_INSTANCE_NAME],
+        ) as api:
+            data[CONF_CAPABILITIES] = await api.probe_capabilities()
+
+    entry = ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title=data[CONF_INSTANCE_NAME],
+        data=data,
+        options={},
+        source="user",
+        unique_id=None,
+        discovery_keys=MappingProxyType({}),
+    )
+    # The device registry only accepts devices of known entries
+    hass.config_entries._entries[entry.entry_id] = entry  # noqa: SLF001
+
+    coordinators = []
+    # The modules a new entry enables, the mock server answers any of them
+    for api_type, module in MODULES.items():
+        if not module.enabled_by_default:
+            continue
+        api = TOPdeskAPI(
+            data[CONF_INSTANCE_HOST],
+            data[CONF_INSTANCE_USERNAME],
+            data[CONF_INSTANCE_PASSWORD],
+            data[CONF_INSTANCE_NAME],
+            api_type=api_type,
+            capabilities=data[CONF_CAPABILITIES],
+        )
+        if args.recording is not None:
+            api.replay = ReplaySession(
+                args.recording, api.host, latency_scale=args.latency_scale
+            )
+        coordinator = TOPdeskDataUpdateCoordinator(
+            hass,
+            api,
+            interval,
+            entry.entry_id,
+            api_type=api_type,
+            # Every tier on the same interval, so each tick fetches every metric
+            tier_intervals=dict.fromkeys(("fast", "standard", "slow"), interval),
+        )
+        coordinators.append(coordinator)
+    return coordinators
+
+
+async def async_run_step(
+    hass: HomeAssistant, url: str, instances: int, args: argparse.Namespace
+) -> dict[str, float]:
+    """Run N instances for the configured duration and measure the loop."""
+    interval = timedelta(seconds=args.interval)
+    setups = await asyncio.gather(
+        *(
+            async_setup_instance(hass, url, index, interval, args)
+            for index in range(instances)
+        )
+    )
+    coordinators = [coordinator for setup in setups for coordinator in setup]
+
+    refreshes = 0
+
+    def count_refresh() -> None:
+        nonlocal refreshes
+        refreshes += 1
+
+    gc.collect()
+    rss_before = current_rss()
+    probe = LoopLagProbe()
+    probe.start()
+    cpu_start = time.process_time()
+
+    # Listeners keep the coordinators polling on their interval
+    unsubs = [
+        coordinator.async_add_listener(count_refresh) for coordinator in coordinators
+    ]
+    await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+    await asyncio.sleep(args.duration)
+
+    cpu = time.process_time() - cpu_start
+    await probe.stop()
+    rss_after = current_rss()
+
+    failed = sum(not coordinator.last_update_success for coordinator in coordinators)
+    unmatched = sum(
+        coordinator.api.replay.unmatched
+        for coordinator in coordinators
+        if coordinator.api.replay is not None
+    )
+    for unsub in unsubs:
+        unsub()
+    for coordinator in coordinators:
+        await coordinator.async_shutdown()
+    for entry_id in list(hass.config_entries._entries):  # noqa: SLF001
+        del hass.config_entries._entries[entry_id]  # noqa: SLF001
+
+    return {
+        "instances": instances,
+        "coordinators": len(coordinators),
+        "refreshes": refreshes,
+        "failed": failed,
+        "unmatched": unmatched,
+        "lag_p50_ms": percentile(probe.samples, 0.5) * 1000,
+        "lag_p95_ms": percentile(probe.samples, 0.95) * 1000,
+        "lag_max_ms": max(probe.samples, default=0) * 1000,
+        "cpu_per_refresh_ms": cpu / refreshes * 1000 if refreshes else 0,
+        "cpu_load": cpu / args.duration,
+        "rss_mb": rss_after / 2**20,
+        "rss_growth_mb": (rss_after - rss_before) / 2**20,
+    }
+
+
+def write_table(rows: list[dict[str, float]]) -> None:
+    """Write the results as a table on stdout."""
+    columns = list(rows[0])
+    sys.stdout.write(" ".join(f"{column:>18}" for column in columns) + "\n")
+    for row in rows:
+        sys.stdout.write(
+            " ".join(
+                f"{row[column]:>18.2f}"
+                if isinstance(row[column], float)
+                else f"{row[column]:>18}"
+                for column in columns
+            )
+            + "\n"
+        )
+
+
+async def async_main(args: argparse.Namespace) -> list[dict[str, float]]:
+    """Start the mock server and Home Assistant, then run every step."""
+    url = f"http://127.0.0.1:{args.port}"
+    if args.recording is not None:
+        # Nothing is sent, every request is answered from the recording
+        return await async_run_steps(url, args)
+
+    server = multiprocessing.Process(
+        target=run_mock_server,
+        args=(args.port, args.latency, args.jitter, args.tickets),
+        kwargs={"count": not args.no_count},
+        daemon=True,
+    )
+    server.start()
+    try:
+        await wait_for_server(url)
+        return await async_run_steps(url, args)
+    finally:
+        server.terminate()
+        server.join()
+
+
+async def async_run_steps(url: str, args: argparse.Namespace) -> list[dict]:
+    """Start Home Assistant and run every step."""
+    rows = []
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_start_hass(config_dir)
+        try:
+            for instances in args.instances:
+                row = await async_run_step(hass, url, instances, args)
+                rows.append(row)
+                write_table([row])
+        finally:
+            await hass.async_stop(force=True)
+    return rows
+
+
+def main() -> None:
+    """Parse the arguments and run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--instances", type=int, nargs="+", default=[1, 10, 25, 50, 100]
+    )
+    parser.add_argument("--duration", type=float, default=60, help="seconds per step")
+    parser.add_argument(
+        "--interval", type=float, default=10, help="refresh interval in seconds"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="mean response time in seconds"
+    )
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument(
+        "--tickets",
+        type=int,
+        default=1000,
+        help="tickets per module, returned as ids when $count is not used",
+    )
+    parser.add_argument(
+        "--no-count",
+        action="store_true",
+        help="reject $count, so every count transfers and parses the ids",
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--replay",
+        type=Path,
+        help="answer from a traffic recording instead of the mock server",
+    )
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=1.0,
+        help="factor applied to the recorded response times, 0 for none",
+    )
+    args = parser.parse_args()
+
+    args.recording = None
+    if args.replay is not None:
+        from topdesk_stats.recording import Recording
+
+        args.recording = Recording.load(args.replay)
+
+    rows = asyncio.run(async_main(args))
+    if len(rows) > 1:
+        sys.stdout.write("\nSummary\n")
+        write_table(rows)
+
+
+if __name__ == "__main__":
+    main()